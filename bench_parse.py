@@ -0,0 +1,134 @@
+"""
+文章页解析微基准：
+- 东方财富：对比优化前（html.parser 完整解析两次）与优化后（单次解析 +
+  只解析标题/正文区域，可选 lxml）的每秒页数；
+- 人民银行：对比优化前（标题、正文、prettify 后重解析、附件各解析一次）
+  与优化后（整页只解析一次，各步骤共用DOM）的每秒页数。
+
+用法:
+    python bench_parse.py                 # 使用合成的文章页
+    python bench_parse.py page1.html ...  # 使用保存下来的真实页面
+"""
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from eastmoney_crawler import EastMoneyCrawler, DEFAULT_HTML_PARSER
+from pbc_crawler import PBCCrawler
+
+
+def build_sample_page():
+    """构造一个结构与东方财富文章页相近的页面：导航、脚本、侧栏和带图片的正文"""
+    nav = ''.join(f'<li><a href="https://www.eastmoney.com/c{i}.html">栏目{i}</a></li>' for i in range(300))
+    scripts = ''.join(f'<script>var cfg{i} = {{"id": {i}, "name": "module{i}"}};</script>' for i in range(40))
+    sidebar = ''.join(f'<div class="side-item"><a href="/a/{i}.html">相关阅读标题{i}</a><span>2025-01-01</span></div>'
+                      for i in range(200))
+    paragraphs = []
+    for i in range(60):
+        paragraphs.append(f'<p>这是正文第{i}段，包含一些<strong>加粗</strong>文字和<a href="/x">链接</a>。' * 3 + '</p>')
+        if i % 6 == 0:
+            paragraphs.append(f'<p><img src="//img.eastmoney.com/chart{i}.png" alt="图表{i}"></p>')
+    return (
+        '<html><head><title>示例文章 - 东方财富</title>' + scripts + '</head><body>'
+        '<div class="header"><ul class="nav">' + nav + '</ul></div>'
+        '<div class="main"><h1 class="article-title">示例文章标题</h1>'
+        '<div class="xeditor_content cfh_web">' + ''.join(paragraphs) + '</div></div>'
+        '<div class="sidebar">' + sidebar + '</div>'
+        '<div class="footer">' + nav + '</div></body></html>'
+    )
+
+
+def build_pbc_sample_page():
+    """构造一个结构与人民银行文章页相近的页面：导航、UCAP-CONTENT正文、图片和Excel附件"""
+    nav = ''.join(f'<li><a href="/goutongjiaoliu/113456/c{i}/index.html">栏目{i}</a></li>' for i in range(300))
+    paragraphs = []
+    for i in range(60):
+        paragraphs.append(f'<p>这是正文第{i}段，包含一些<strong>加粗</strong>文字。' * 3 + '</p>')
+        if i % 10 == 0:
+            paragraphs.append(f'<p><img src="W0202501{i:02d}.png"></p>')
+    attachments = ''.join(f'<a href="/attach/report{i}.xlsx">附件{i}.xlsx</a>' for i in range(3))
+    return (
+        '<html><head><title>示例公告 - 中国人民银行</title></head><body>'
+        '<div class="header"><ul class="nav">' + nav + '</ul></div>'
+        '<h2 style="font-size: 16px;color: #333;">示例公告标题</h2>'
+        '<div id="UCAP-CONTENT">' + ''.join(paragraphs) + attachments + '</div>'
+        '<div class="footer">' + nav + '</div></body></html>'
+    )
+
+
+def run(label, func, pages, min_seconds=2.0):
+    """重复解析直到至少运行 min_seconds 秒，返回每秒页数"""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for html in pages:
+            func(html)
+        count += len(pages)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+    rate = count / elapsed
+    print(f"{label:<36} {rate:8.1f} 页/秒")
+    return rate
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = []
+        for path in sys.argv[1:]:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    else:
+        pages = [build_sample_page()]
+
+    quiet = lambda message, level="INFO": None
+    crawler = EastMoneyCrawler(log_callback=quiet)
+    print("== 东方财富 ==")
+    print(f"页面数: {len(pages)}，平均大小: {sum(len(p) for p in pages) // len(pages) // 1024} KB")
+
+    def before(html):
+        crawler.extract_article_title(html)
+        crawler.extract_article_content_with_images(html)
+
+    crawler.config['html_parser'] = 'html.parser'
+    baseline = run("优化前 (html.parser, 解析两次)", before, pages)
+    run("单次解析 (html.parser)", crawler.extract_article, pages)
+
+    if DEFAULT_HTML_PARSER == 'lxml':
+        crawler.config['html_parser'] = 'lxml'
+        best = run("单次解析 (lxml)", crawler.extract_article, pages)
+        print(f"提升: {best / baseline:.1f}x")
+    else:
+        print("未安装lxml，跳过lxml测试")
+
+    if len(sys.argv) == 1:
+        pages = [build_pbc_sample_page()]
+    pbc = PBCCrawler(log_callback=quiet)
+    print("== 人民银行 ==")
+
+    def pbc_before(html):
+        # 优化前的 process_single_url：标题、正文各解析一次，正文 prettify 后
+        # 在 save_html_to_doc 中重解析，download_excel_files 再解析整页
+        pbc.extract_title(BeautifulSoup(html, 'html.parser'))
+        content = pbc.extract_content(BeautifulSoup(html, 'html.parser'))
+        BeautifulSoup(content['html'], 'html.parser').find_all('img')
+        BeautifulSoup(html, 'html.parser').find_all('a', href=True)
+
+    def pbc_after(html):
+        soup = pbc.parse_document(html)
+        pbc.extract_title(soup)
+        (pbc.extract_content_node(soup) or soup).find_all('img')
+        soup.find_all('a', href=True)
+
+    pbc.config['html_parser'] = 'html.parser'
+    baseline = run("优化前 (html.parser, 解析四次)", pbc_before, pages)
+    best = run("单次解析 (html.parser)", pbc_after, pages)
+    if DEFAULT_HTML_PARSER == 'lxml':
+        pbc.config['html_parser'] = 'lxml'
+        best = run("单次解析 (lxml)", pbc_after, pages)
+    print(f"提升: {best / baseline:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
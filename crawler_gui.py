@@ -1,10 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
-import queue
+import multiprocessing
+import collections
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from crawler_utils import CancelToken
 
 class ModernCheckbutton(ttk.Frame):
     """
@@ -74,7 +77,109 @@ class ModernCheckbutton(ttk.Frame):
             self.icon_label.config(fg=self.color_off)
 
 
+class PlatformProgress(ttk.Frame):
+    """
+    单个平台的进度行：平台名、确定进度条和统计文字。
+    定时传入爬虫的进度快照（CrawlProgress.snapshot），
+    文章速率和下载速率按最近 window 秒内的变化计算，限速或卡住时能及时反映出来。
+    """
+    def __init__(self, master, name, window=30, bg_color='#ffffff', **kwargs):
+        super().__init__(master, **kwargs)
+        self.configure(style='Card.TFrame')
+        self.window = window
+        self.samples = collections.deque()  # (时间, 已处理文章数, 已下载字节数)
+        self.finished = False
+
+        self.name_label = tk.Label(self, text=name, width=12, anchor=tk.W, font=('Segoe UI', 9),
+                                   fg='#2c3e50', bg=bg_color, bd=0)
+        self.name_label.pack(side=tk.LEFT)
+
+        self.bar = ttk.Progressbar(self, mode='determinate', maximum=100, style='Modern.Horizontal.TProgressbar')
+        self.bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
+
+        self.stats_label = tk.Label(self, text="准备中...", width=60, anchor=tk.W, font=('Segoe UI', 9),
+                                    fg='#7f8c8d', bg=bg_color, bd=0)
+        self.stats_label.pack(side=tk.LEFT)
+
+    @staticmethod
+    def format_bytes(size):
+        """字节数转为便于阅读的单位"""
+        for unit in ('B', 'KB', 'MB'):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} GB"
+
+    @staticmethod
+    def format_duration(seconds):
+        """秒数转为 mm:ss 或 h:mm:ss"""
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+    def rates(self, processed, downloaded, now=None):
+        """记录一个采样点，返回最近窗口内的 (篇/分, 字节/秒)"""
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, processed, downloaded))
+        # 保留窗口起点之前的最后一个采样点，窗口内只有一个点时也能算出速率
+        while len(self.samples) > 2 and now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+
+        start_time, start_processed, start_bytes = self.samples[0]
+        span = now - start_time
+        if span <= 0:
+            return 0.0, 0.0
+        return (processed - start_processed) / span * 60, (downloaded - start_bytes) / span
+
+    def update_progress(self, snapshot, now=None):
+        """按进度快照刷新进度条和统计文字"""
+        processed = snapshot['articles_done'] + snapshot['articles_failed']
+        article_rate, byte_rate = self.rates(processed, snapshot['bytes'], now)
+
+        total = snapshot['articles_total']
+        if total:
+            self.bar['value'] = min(processed / total * 100, 100)
+            text = f"文章 {processed}/{total}"
+        elif snapshot['pages_total']:
+            # 文章总数未知时（列表页尚未抓完）先按列表页进度显示
+            self.bar['value'] = min(snapshot['pages_listed'] / snapshot['pages_total'] * 100, 100)
+            text = f"列表 {snapshot['pages_listed']}/{snapshot['pages_total']} 页"
+        else:
+            text = "准备中..."
+
+        if snapshot['articles_failed']:
+            text += f"（失败 {snapshot['articles_failed']}）"
+
+        if total and article_rate > 0:
+            eta = self.format_duration(max(total - processed, 0) / article_rate * 60)
+        else:
+            eta = "--:--"
+
+        text += f" | {article_rate:.1f} 篇/分 | {self.format_bytes(byte_rate)}/s | 剩余 {eta}"
+        self.stats_label.config(text=text)
+
+    def finish(self, snapshot, success):
+        """平台结束后显示最终统计：文章、图片、附件数，下载总量和用时，不再刷新"""
+        self.finished = True
+        processed = snapshot['articles_done'] + snapshot['articles_failed']
+        elapsed = snapshot['elapsed']
+        if snapshot['articles_total']:
+            self.bar['value'] = min(processed / snapshot['articles_total'] * 100, 100)
+
+        text = "完成" if success else "未完成"
+        text += f" | 文章 {snapshot['articles_done']} 篇"
+        if snapshot['articles_failed']:
+            text += f"（失败 {snapshot['articles_failed']}）"
+        text += f" | 图片 {snapshot['images']} | 附件 {snapshot['attachments']}"
+        text += f" | 共 {self.format_bytes(snapshot['bytes'])} | 用时 {self.format_duration(elapsed)}"
+        self.stats_label.config(text=text, fg='#27ae60' if success else '#c0392b')
+
+
 class ModernCrawlerGUI:
+    # 平台名称：任务、日志前缀、日志文件、进度行和结果目录共用
+    EASTMONEY_NAME = "东方财富"
+    PBC_NAME = "中国人民银行"
+    
     def __init__(self, root):
         self.root = root
         self.root.title("数据采集助手 Pro")
@@ -104,9 +209,23 @@ class ModernCrawlerGUI:
         except:
             pass
         
+        # 日志配置
+        self.log_max_lines = 5000  # 日志框最多保留的行数，超出后删除最早的行
+        self.log_pending_max = 20000  # 等待显示的日志条数上限，界面来不及显示时丢弃最早的
+        self.log_file_name = 'crawl.log'  # 完整日志文件名，保存在结果目录下，为空时不写文件
+        self.log_level = 'INFO'  # 日志框显示的最低级别
+        self.log_file_level = 'INFO'  # 日志文件记录的最低级别，排查问题时可设为 DEBUG
+        
         # 数据初始化
-        self.log_queue = queue.Queue()
+        self.log_buffer = collections.deque(maxlen=self.log_pending_max)  # 环形缓冲，多个爬虫线程写入
+        self.log_dropped = 0  # 来不及显示而丢弃的日志条数
+        self.log_file = None
+        self.log_file_lock = threading.Lock()
         self.is_crawling = False
+        self.progress_interval = 500  # 进度刷新间隔（毫秒）
+        self.platform_rows = {}  # 平台名 -> 进度行控件
+        self.platform_progress = {}  # 平台名 -> 爬虫的进度计数器，爬虫创建后登记
+        self.cancel_token = CancelToken()  # 每次任务新建，传给各平台爬虫，停止时取消
         self.current_keyword = ""
         self.current_results_dir = ""
         
@@ -114,8 +233,9 @@ class ModernCrawlerGUI:
         self.setup_styles()
         self.setup_ui()
         
-        # 启动日志监听
+        # 启动日志监听和进度刷新
         self.update_logs()
+        self.update_progress()
     
     def setup_styles(self):
         """配置现代化UI样式"""
@@ -283,7 +403,9 @@ class ModernCrawlerGUI:
         self.status_label = ttk.Label(status_frame, text="系统就绪", font=('Segoe UI', 9), foreground=self.colors['text_light'], background=self.colors['panel_bg'])
         self.status_label.pack(side=tk.LEFT)
         
-        self.progress = ttk.Progressbar(status_frame, mode='indeterminate', style='Modern.Horizontal.TProgressbar')
+        # --- 各平台进度 ---
+        self.progress_frame = ttk.Frame(main_pad, style='Card.TFrame')
+        self.progress_frame.pack(fill=tk.X, pady=(0, 8))
         
         # --- 日志终端区域 ---
         log_container = ttk.LabelFrame(main_pad, text=" 运行日志 ", style='Card.TLabelframe', padding=1)
@@ -318,7 +440,8 @@ class ModernCrawlerGUI:
         else:
             self.start_button.state(['disabled'])
 
-    def log_message(self, message, level="INFO"):
+    def format_log_line(self, message, level):
+        """返回 (带时间和级别的日志行, 文本标签)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         if level == "ERROR":
             msg_content = f"[{timestamp}] [ERR] {message}\n"
@@ -329,24 +452,86 @@ class ModernCrawlerGUI:
         elif level == "SUCCESS":
             msg_content = f"[{timestamp}] [OK]  {message}\n"
             tag = "success"
+        elif level == "DEBUG":
+            msg_content = f"[{timestamp}] [DBG] {message}\n"
+            tag = "debug"
         else:
             msg_content = f"[{timestamp}] [INF] {message}\n"
             tag = "info"
-            
-        self.log_queue.put((msg_content, tag))
+        return msg_content, tag
+
+    def log_message(self, message, level="INFO", to_file=True):
+        """显示一条日志，to_file 时同时写入日志文件（爬虫日志由单独的文件订阅者写入）"""
+        msg_content, tag = self.format_log_line(message, level)
+        
+        # 完整日志写入文件，界面只显示最近的部分
+        if to_file:
+            self.write_log_file(msg_content)
+        
+        if len(self.log_buffer) == self.log_buffer.maxlen:
+            self.log_dropped += 1
+        self.log_buffer.append((msg_content, tag))
 
     def update_logs(self):
+        """每个周期把缓冲中的日志一次性写入日志框，只刷新一次界面，并删除超出上限的旧行"""
+        batch = []
         try:
             while True:
-                message, tag = self.log_queue.get_nowait()
-                self.log_text.config(state=tk.NORMAL)
-                self.log_text.insert(tk.END, message, tag)
-                self.log_text.see(tk.END)
-                self.log_text.config(state=tk.DISABLED)
-        except queue.Empty:
+                batch.append(self.log_buffer.popleft())
+        except IndexError:
             pass
+        
+        if batch:
+            # Text.insert 一次可以插入多段带标签的文本，相邻同标签的消息合并为一段
+            chunks = []
+            for message, tag in batch:
+                if chunks and chunks[-1] == tag:
+                    chunks[-2] += message
+                else:
+                    chunks.extend([message, tag])
+            
+            dropped, self.log_dropped = self.log_dropped, 0
+            if dropped:
+                chunks[:0] = [f"... 日志过多，省略 {dropped} 条（完整日志见 {self.log_file_name}）\n", "warning"]
+            
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.insert(tk.END, *chunks)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - self.log_max_lines
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see(tk.END)
+            self.log_text.config(state=tk.DISABLED)
+        
+        with self.log_file_lock:
+            if self.log_file:
+                self.log_file.flush()
         self.root.after(100, self.update_logs)
 
+    def write_log_file(self, text):
+        if self.log_file:
+            with self.log_file_lock:
+                if self.log_file:
+                    self.log_file.write(text)
+
+    def open_log_file(self, folder):
+        """在结果目录下打开完整日志文件（追加）"""
+        self.close_log_file()
+        if not self.log_file_name:
+            return
+        try:
+            log_file = open(os.path.join(folder, self.log_file_name), 'a', encoding='utf-8')
+        except OSError as e:
+            self.log_message(f"无法打开日志文件: {e}", "WARNING")
+            return
+        with self.log_file_lock:
+            self.log_file = log_file
+
+    def close_log_file(self):
+        with self.log_file_lock:
+            log_file, self.log_file = self.log_file, None
+        if log_file:
+            log_file.close()
+
     def clear_logs(self):
         self.log_text.config(state=tk.NORMAL)
         self.log_text.delete(1.0, tk.END)
@@ -366,19 +551,21 @@ class ModernCrawlerGUI:
             
         self.current_keyword = keyword
         self.is_crawling = True
-        self.current_results_dir = f"Result_{self.clean_filename(keyword)}_{int(time.time())}"
+        self.cancel_token = CancelToken()
+        # 同一关键词固定使用同一结果目录，配合增量索引只处理新增或变化的文章
+        self.current_results_dir = f"Result_{self.clean_filename(keyword)}"
         
         if not os.path.exists(self.current_results_dir):
             os.makedirs(self.current_results_dir)
+        self.open_log_file(self.current_results_dir)
             
         # UI 更新
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         self.keyword_entry.config(state=tk.DISABLED)
         
-        # 显示进度条
-        self.progress.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=(10, 0))
-        self.progress.start(15)
+        # 每个勾选的平台一行进度
+        self.setup_progress_rows()
         self.status_label.config(text=f"正在运行: {keyword}", foreground=self.colors['primary'])
         
         self.log_message(f"任务启动 - 关键词: {keyword}", "SUCCESS")
@@ -389,35 +576,44 @@ class ModernCrawlerGUI:
 
     def stop_crawling(self):
         self.is_crawling = False
+        # 取消令牌：爬虫中的等待立即结束，在途请求被中断
+        self.cancel_token.cancel()
         self.log_message("正在请求停止...", "WARNING")
         self.status_label.config(text="正在停止...", foreground=self.colors['danger'])
 
     def run_crawlers(self):
-        """运行实际的爬虫任务"""
+        """运行实际的爬虫任务：各平台互不相关，在各自的线程中同时爬取，全部结束后汇总结果"""
         try:
             start_time = time.time()
-            success_count = 0
-            total_platforms = 0
             
-            # 东方财富爬取
-            if self.eastmoney_var.get() and self.is_crawling:
-                total_platforms += 1
-                eastmoney_dir = os.path.join(self.current_results_dir, "东方财富")
-                if not os.path.exists(eastmoney_dir):
-                    os.makedirs(eastmoney_dir)
-                
-                if self.run_eastmoney_crawler(eastmoney_dir):
-                    success_count += 1
+            tasks = []
+            if self.eastmoney_var.get():
+                tasks.append((self.EASTMONEY_NAME, self.run_eastmoney_crawler))
+            if self.pbc_var.get():
+                tasks.append((self.PBC_NAME, self.run_pbc_crawler))
             
-            # 中国人民银行爬取
-            if self.pbc_var.get() and self.is_crawling:
-                total_platforms += 1
-                pbc_dir = os.path.join(self.current_results_dir, "中国人民银行")
-                if not os.path.exists(pbc_dir):
-                    os.makedirs(pbc_dir)
+            def run_platform(name, run):
+                platform_dir = os.path.join(self.current_results_dir, name)
+                if not os.path.exists(platform_dir):
+                    os.makedirs(platform_dir)
                 
-                if self.run_pbc_crawler(pbc_dir):
-                    success_count += 1
+                platform_start = time.time()
+                success = False
+                try:
+                    success = run(platform_dir)
+                finally:
+                    self.log_message(f"{name}耗时: {time.time() - platform_start:.1f}秒")
+                    self.root.after(0, lambda: self.finish_progress(name, success))
+                return success
+            
+            results = []
+            if tasks and self.is_crawling:
+                with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="platform") as executor:
+                    futures = [executor.submit(run_platform, name, run) for name, run in tasks]
+                    results = [future.result() for future in futures]
+            
+            success_count = sum(1 for success in results if success)
+            total_platforms = len(results)
             
             # 计算耗时
             elapsed_time = time.time() - start_time
@@ -441,16 +637,35 @@ class ModernCrawlerGUI:
             # 恢复UI状态
             self.root.after(0, self.reset_ui)
 
+    def platform_logger(self, name):
+        """返回显示爬虫日志的回调，日志带上平台名前缀，区分同时运行的各平台日志"""
+        def log(message, level="INFO"):
+            self.log_message(f"[{name}] {message}", level, to_file=False)
+        return log
+
+    def subscribe_log_file(self, crawler, name):
+        """日志文件作为单独的订阅者接收爬虫事件，记录级别由 log_file_level 决定"""
+        if not self.log_file:
+            return
+        
+        def write(event):
+            self.write_log_file(self.format_log_line(f"[{name}] {event.message}", event.level)[0])
+        crawler.events.subscribe(write, self.log_file_level)
+
     def run_eastmoney_crawler(self, save_dir):
-        """运行东方财富爬虫"""
+        """运行东方财富爬虫，结束后释放爬虫的连接和线程"""
+        crawler = None
         try:
             self.log_message("开始爬取东方财富...")
             
             # 导入东方财富爬虫
             from eastmoney_crawler import EastMoneyCrawler
             
-            # 创建爬虫实例
-            crawler = EastMoneyCrawler(log_callback=self.log_message)
+            # 创建爬虫实例，与其他平台同时运行时日志带上平台名
+            crawler = EastMoneyCrawler(log_callback=self.platform_logger(self.EASTMONEY_NAME), cancel_token=self.cancel_token,
+                                       log_level=self.log_level)
+            self.subscribe_log_file(crawler, self.EASTMONEY_NAME)
+            self.platform_progress[self.EASTMONEY_NAME] = crawler.progress
             
             # 运行爬虫
             results = crawler.crawl_keyword(self.current_keyword, save_dir)
@@ -467,17 +682,25 @@ class ModernCrawlerGUI:
         except Exception as e:
             self.log_message(f"东方财富爬取错误: {str(e)}", "ERROR")
             return False
+        
+        finally:
+            if crawler:
+                crawler.close()
 
     def run_pbc_crawler(self, save_dir):
-        """运行中国人民银行爬虫"""
+        """运行中国人民银行爬虫，结束后释放爬虫的连接和线程"""
+        crawler = None
         try:
             self.log_message("开始爬取中国人民银行...")
             
             # 导入中国人民银行爬虫
             from pbc_crawler import PBCCrawler
             
-            # 创建爬虫实例
-            crawler = PBCCrawler(log_callback=self.log_message)
+            # 创建爬虫实例，与其他平台同时运行时日志带上平台名
+            crawler = PBCCrawler(log_callback=self.platform_logger(self.PBC_NAME), cancel_token=self.cancel_token,
+                                 log_level=self.log_level)
+            self.subscribe_log_file(crawler, self.PBC_NAME)
+            self.platform_progress[self.PBC_NAME] = crawler.progress
             
             # 运行爬虫
             success = crawler.crawl_keyword(self.current_keyword, save_dir)
@@ -492,17 +715,52 @@ class ModernCrawlerGUI:
         except Exception as e:
             self.log_message(f"中国人民银行爬取错误: {str(e)}", "ERROR")
             return False
+        
+        finally:
+            if crawler:
+                crawler.close()
 
     def reset_ui(self):
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.keyword_entry.config(state=tk.NORMAL)
-        self.progress.stop()
-        self.progress.pack_forget() # 隐藏进度条
         self.status_label.config(text="系统就绪", foreground=self.colors['text_light'])
         self.is_crawling = False
+        self.close_log_file()
         self.update_button_state()
 
+    def setup_progress_rows(self):
+        """清除上次任务的进度行，为本次勾选的平台各建一行"""
+        for row in self.platform_rows.values():
+            row.destroy()
+        self.platform_rows = {}
+        self.platform_progress = {}
+        
+        names = []
+        if self.eastmoney_var.get():
+            names.append(self.EASTMONEY_NAME)
+        if self.pbc_var.get():
+            names.append(self.PBC_NAME)
+        for name in names:
+            row = PlatformProgress(self.progress_frame, name, bg_color=self.colors['panel_bg'])
+            row.pack(fill=tk.X, pady=2)
+            self.platform_rows[name] = row
+
+    def update_progress(self):
+        """定时读取各平台的进度快照刷新进度行，已结束的平台保留最终统计"""
+        for name, row in self.platform_rows.items():
+            progress = self.platform_progress.get(name)
+            if progress is not None and not row.finished:
+                row.update_progress(progress.snapshot())
+        self.root.after(self.progress_interval, self.update_progress)
+
+    def finish_progress(self, name, success):
+        """平台结束后在其进度行显示最终统计（在界面线程中调用）"""
+        row = self.platform_rows.get(name)
+        progress = self.platform_progress.get(name)
+        if row is not None and progress is not None:
+            row.finish(progress.snapshot(), success and self.is_crawling)
+
     def open_results_folder(self):
         if hasattr(self, 'current_results_dir') and os.path.exists(self.current_results_dir):
             try:
@@ -525,6 +783,7 @@ def main():
     app.log_text.tag_config("warning", foreground="#f1c40f") # 金黄
     app.log_text.tag_config("success", foreground="#2ecc71") # 亮绿
     app.log_text.tag_config("info", foreground="#3498db")    # 亮蓝
+    app.log_text.tag_config("debug", foreground="#7f8c8d")   # 灰色
     
     # 居中显示
     root.update_idletasks()
@@ -537,4 +796,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # 打包后的程序启动文档渲染子进程时需要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
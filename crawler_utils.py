@@ -0,0 +1,1213 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import random
+import re
+import shutil
+import socket
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from curl_cffi import requests as cffi_requests
+
+# 安装了lxml时使用更快的lxml解析器
+try:
+    import lxml  # noqa: F401
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
+
+
+# 日志级别：数值越大越重要，低于所有订阅者阈值的事件不会被创建和格式化
+LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'SUCCESS': 25, 'WARNING': 30, 'ERROR': 40}
+
+
+class CrawlEvent:
+    """
+    爬虫事件：kind 为事件类型（article_started、page_fetched、image_done、retry 等），
+    fields 为结构化字段，message 在第一次读取时才按模板格式化
+    """
+    __slots__ = ('kind', 'level', 'levelno', 'template', 'fields', 'time', '_message')
+
+    def __init__(self, kind, level, levelno, template, fields):
+        self.kind = kind
+        self.level = level
+        self.levelno = levelno
+        self.template = template
+        self.fields = fields
+        self.time = time.time()
+        self._message = None
+
+    @property
+    def message(self):
+        if self._message is None:
+            # 没有字段的事件（普通日志）模板本身就是消息，不做格式化
+            self._message = self.template.format(**self.fields) if self.fields else self.template
+        return self._message
+
+
+class EventBus:
+    """
+    爬虫事件分发：界面、日志文件等订阅者各自指定最低级别。
+    emit 先与所有订阅者中最低的阈值比较，低于阈值时直接返回，不创建事件对象也不格式化消息。
+    """
+    def __init__(self):
+        self._subscribers = ()  # ((回调, 最低级别数值), ...)，整体替换，emit 时无需加锁
+        self._threshold = math.inf
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, level='INFO'):
+        """订阅不低于 level 的事件，callback(event)，返回取消订阅的函数"""
+        entry = (callback, LOG_LEVELS[level])
+        with self._lock:
+            self._subscribers += (entry,)
+            self._update_threshold()
+        
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = tuple(item for item in self._subscribers if item is not entry)
+                self._update_threshold()
+        return unsubscribe
+
+    def _update_threshold(self):
+        self._threshold = min((levelno for _, levelno in self._subscribers), default=math.inf)
+
+    def enabled(self, level):
+        """是否有订阅者接收该级别的事件，用于跳过只为日志准备数据的代码"""
+        return LOG_LEVELS.get(level, 20) >= self._threshold
+
+    def emit(self, kind, level, template, **fields):
+        """发出事件：template 为 str.format 模板，fields 为对应的字段"""
+        levelno = LOG_LEVELS.get(level, 20)
+        if levelno < self._threshold:
+            return
+        event = CrawlEvent(kind, level, levelno, template, fields)
+        for callback, min_levelno in self._subscribers:
+            if levelno >= min_levelno:
+                callback(event)
+
+
+class CrawlProgress:
+    """
+    爬取进度计数器：列表页数、文章数（完成/失败）、图片和附件数、下载字节数。
+    爬虫线程只做累加，界面定时读取快照计算速率和剩余时间，多个线程共享同一个实例。
+    """
+    FIELDS = ('pages_listed', 'pages_total', 'articles_total', 'articles_done', 'articles_failed',
+              'images', 'attachments', 'bytes')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """开始新的爬取时清零"""
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+            self.started_at = time.monotonic()
+
+    def add(self, **deltas):
+        """累加计数，如 add(articles_done=1, bytes=1024)"""
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counts[name] += delta
+
+    def set(self, **values):
+        """设置总数等绝对值，如 set(pages_total=10)"""
+        with self._lock:
+            self._counts.update(values)
+
+    def snapshot(self):
+        """返回当前计数的副本，另含 elapsed（已运行秒数）"""
+        with self._lock:
+            snapshot = dict(self._counts)
+        snapshot['elapsed'] = time.monotonic() - self.started_at
+        return snapshot
+
+
+def get_host(url):
+    """提取URL中的主机名（含端口）"""
+    return urlparse(url).netloc.lower()
+
+
+def reserve_doc_path(doc_dir, name, ext='.docx'):
+    """
+    为文档预占一个不重名的路径，文件名已存在时添加序号。
+    使用独占创建占位文件，多个线程同时保存同名文章时不会互相覆盖。
+    """
+    original_doc_path = os.path.join(doc_dir, f"{name}{ext}")
+    doc_path = original_doc_path
+    counter = 1
+    while True:
+        try:
+            fd = os.open(doc_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            return doc_path
+        except FileExistsError:
+            base, suffix = os.path.splitext(original_doc_path)
+            doc_path = f"{base}_{counter}{suffix}"
+            counter += 1
+
+
+def release_doc_path(doc_path):
+    """文档生成失败时删除预占的路径（占位文件或未写完的文档），避免留下打不开的空文档"""
+    try:
+        os.remove(doc_path)
+    except OSError:
+        pass
+
+
+class HostRateLimiter:
+    """
+    按主机限速器：同一主机的相邻两次请求之间至少间隔 min_interval~max_interval 秒。
+    多个线程共享同一个实例，取代每次请求前固定的 time.sleep。
+    """
+    def __init__(self, min_interval=1.0, max_interval=None, sleep_func=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval if max_interval is not None else min_interval
+        self.sleep_func = sleep_func if sleep_func else time.sleep
+        self._next_slot = {}  # host -> 下一个可用的发送时间点
+        self._lock = threading.Lock()
+
+    def _reserve(self, url):
+        """为目标主机预约下一个发送时间点，返回需要等待的秒数"""
+        host = get_host(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot.get(host, now), now)
+            interval = random.uniform(self.min_interval, self.max_interval)
+            self._next_slot[host] = slot + interval
+        return max(slot - now, 0)
+
+    def acquire(self, url):
+        """阻塞直到可以向目标主机发送请求，返回实际等待秒数"""
+        wait = self._reserve(url)
+        if wait > 0:
+            self.sleep_func(wait)
+        return wait
+
+    async def acquire_async(self, url):
+        """acquire 的协程版本，等待期间不阻塞事件循环"""
+        wait = self._reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """目标主机处于熔断状态，请求没有发出；retry_after 为距熔断结束的秒数"""
+    def __init__(self, *args, retry_after=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
+class CrawlCancelled(requests.exceptions.RequestException):
+    """爬取已取消，请求没有发出或被中途中止"""
+
+
+class CancelToken:
+    """
+    协作式取消令牌：界面和爬虫共享同一个实例，cancel 后所有通过令牌等待的延时立即结束，
+    登记在令牌上的在途连接被关闭，请求随即出错返回。可以在任意线程中调用 cancel。
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = {}  # 编号 -> 取消时调用的函数
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """取消：唤醒所有等待，并依次调用登记的取消回调"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def reset(self):
+        """恢复为未取消状态，供同一个爬虫实例再次爬取"""
+        self._event.clear()
+
+    def on_cancel(self, callback):
+        """
+        登记取消时调用的函数，返回注销函数。已经取消时立即调用
+        回调在调用 cancel 的线程中执行，应当很快返回
+        """
+        with self._lock:
+            if not self._event.is_set():
+                callback_id = self._next_id
+                self._next_id += 1
+                self._callbacks[callback_id] = callback
+                return lambda: self._callbacks.pop(callback_id, None)
+        callback()
+        return lambda: None
+
+    def check(self):
+        """已经取消时抛出 CrawlCancelled"""
+        if self._event.is_set():
+            raise CrawlCancelled("爬取已取消")
+
+    def wait(self, timeout=None):
+        """最多等待 timeout 秒，取消时立即返回，返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def sleep(self, seconds):
+        """可被取消的 time.sleep，取消时抛出 CrawlCancelled"""
+        if self._event.wait(seconds):
+            raise CrawlCancelled("爬取已取消")
+
+    def result(self, future):
+        """等待 Future 完成并返回结果，取消时不再等待，抛出 CrawlCancelled"""
+        done = threading.Event()
+        future.add_done_callback(lambda _: done.set())
+        remove = self.on_cancel(done.set)
+        try:
+            done.wait()
+        finally:
+            remove()
+        if not future.done():
+            future.cancel()
+            raise CrawlCancelled("爬取已取消")
+        return future.result()
+
+
+def _cancellable_pool_class(pool_class, cancel_token):
+    """生成连接会登记到取消令牌的连接池类：令牌取消时关闭连接的套接字，阻塞的读写立即出错返回"""
+    class CancellableConnection(pool_class.ConnectionCls):
+        _remove_cancel_hook = None
+
+        def connect(self):
+            cancel_token.check()
+            super().connect()
+            self._remove_cancel_hook = cancel_token.on_cancel(self.abort)
+
+        def abort(self):
+            sock = self.sock
+            if sock is not None:
+                try:
+                    # 绕过 SSLSocket.shutdown，直接关闭底层套接字，唤醒其他线程中阻塞的读取
+                    socket.socket.shutdown(sock, socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+        def close(self):
+            if self._remove_cancel_hook:
+                self._remove_cancel_hook()
+                self._remove_cancel_hook = None
+            super().close()
+
+    class CancellablePool(pool_class):
+        ConnectionCls = CancellableConnection
+
+    return CancellablePool
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """
+    可取消的 requests 适配器：取消令牌取消后，新请求直接抛出 CrawlCancelled，
+    在途请求的连接被关闭，请求出错后同样抛出 CrawlCancelled
+    """
+    def __init__(self, cancel_token, **kwargs):
+        self.cancel_token = cancel_token
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _cancellable_pool_class(HTTPConnectionPool, self.cancel_token),
+            'https': _cancellable_pool_class(HTTPSConnectionPool, self.cancel_token),
+        }
+
+    def send(self, request, **kwargs):
+        self.cancel_token.check()
+        try:
+            return super().send(request, **kwargs)
+        except requests.exceptions.RequestException:
+            if self.cancel_token.cancelled:
+                raise CrawlCancelled("请求已取消")
+            raise
+
+
+def cancellable_session(cancel_token, pool_maxsize=10):
+    """创建请求可被取消令牌中断的 requests 会话"""
+    session = requests.Session()
+    adapter = CancellableHTTPAdapter(cancel_token, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class RetryPolicy:
+    """
+    两个爬虫共用的重试策略：网络错误和 429/5xx 状态码按指数退避加随机抖动重试，
+    服务器给出 Retry-After 时按其等待。同时按主机熔断：连续失败 breaker_threshold 次后，
+    breaker_cooldown 秒内对该主机的请求直接抛出 CircuitOpenError，冷却后放行一个试探请求，
+    成功则恢复。多个线程或协程共享同一个实例。
+    """
+    RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+    RETRY_EXCEPTIONS = (requests.exceptions.RequestException, cffi_requests.RequestsError)
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=30.0, breaker_threshold=5,
+                 breaker_cooldown=60.0, sleep_func=None, log_callback=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.sleep_func = sleep_func if sleep_func else time.sleep
+        self.log = log_callback if log_callback else (lambda message, level="INFO": None)
+        self._failures = {}  # host -> 连续失败次数
+        self._open_until = {}  # host -> 熔断结束时间点
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_retry_after(value):
+        """解析 Retry-After（秒数或HTTP日期），返回需要等待的秒数，无法解析时返回None"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def backoff(self, attempt):
+        """第 attempt 次（从0开始）重试前的等待秒数：指数增长，上限 max_delay，后一半随机抖动"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _check(self, host):
+        """请求前检查熔断状态；冷却结束后只放行一个试探请求"""
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return
+            now = time.monotonic()
+            if now < open_until:
+                raise CircuitOpenError(f"主机 {host} 熔断中，{open_until - now:.1f}秒后重试",
+                                       retry_after=open_until - now)
+            # 试探请求在途期间其他请求仍被拒绝
+            self._open_until[host] = now + self.breaker_cooldown
+
+    def _record(self, host, success, open_for=None):
+        """记录一次请求结果，返回熔断是否处于打开状态"""
+        with self._lock:
+            if success:
+                self._failures.pop(host, None)
+                self._open_until.pop(host, None)
+                return False
+            
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.breaker_threshold or open_for:
+                duration = max(open_for or 0, self.breaker_cooldown)
+                newly_open = host not in self._open_until
+                self._open_until[host] = time.monotonic() + duration
+                if newly_open:
+                    self.log(f"主机 {host} 连续失败 {failures} 次，暂停请求 {duration:.0f} 秒", "WARNING")
+                return True
+            return False
+
+    def _next_delay(self, host, attempt, url, response=None, error=None):
+        """
+        根据本次请求结果决定是否重试：返回重试前的等待秒数，不需要（或不能）重试时返回None
+        """
+        if error is None and response.status_code not in self.RETRY_STATUS_CODES:
+            self._record(host, True)
+            return None
+        
+        delay = self.backoff(attempt)
+        open_for = None
+        if error is None:
+            reason = f"状态码 {response.status_code}"
+            retry_after = self.parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                if retry_after > self.max_delay:
+                    # 服务器要求等待的时间过长，不再重试，直接熔断该主机
+                    open_for = retry_after
+                delay = max(delay, retry_after)
+        else:
+            reason = str(error) or type(error).__name__
+        
+        if self._record(host, False, open_for) or attempt >= self.max_retries:
+            return None
+        
+        self.log(f"请求失败（{reason}），{delay:.1f}秒后第{attempt + 1}次重试: {url}")
+        return delay
+
+    def call(self, func, url, *args, **kwargs):
+        """
+        按策略调用 func(url, *args, **kwargs)：网络错误重试用尽后抛出最后一次的异常，
+        可重试状态码重试用尽后返回最后一次的响应，主机熔断时抛出 CircuitOpenError
+        """
+        host = get_host(url)
+        attempt = 0
+        while True:
+            self._check(host)
+            try:
+                response = func(url, *args, **kwargs)
+            except CrawlCancelled:
+                raise
+            except self.RETRY_EXCEPTIONS as e:
+                delay = self._next_delay(host, attempt, url, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._next_delay(host, attempt, url, response=response)
+                if delay is None:
+                    return response
+                response.close()
+            self.sleep_func(delay)
+            attempt += 1
+
+    async def call_async(self, func, url, *args, **kwargs):
+        """call 的协程版本，func 为协程函数，等待期间不阻塞事件循环"""
+        host = get_host(url)
+        attempt = 0
+        while True:
+            self._check(host)
+            try:
+                response = await func(url, *args, **kwargs)
+            except CrawlCancelled:
+                raise
+            except self.RETRY_EXCEPTIONS as e:
+                delay = self._next_delay(host, attempt, url, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._next_delay(host, attempt, url, response=response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+class HttpTransport:
+    """
+    爬虫共享的HTTP传输层：按主机维护 keep-alive 连接池，列表、文章和图片请求共用，
+    避免每次请求重新进行TCP/TLS握手。同时统计每个主机的请求数和新建连接数。
+    impersonate=True 的请求走 curl_cffi 会话（模拟浏览器指纹），其余走 requests 会话。
+    指定 cancel_token 时请求可以被取消：requests 会话的在途连接直接关闭；curl 传输无法从
+    其他线程中断，改在传输层自己的线程中执行，取消时调用方立即返回，传输在超时内自行结束。
+    """
+    def __init__(self, headers=None, pool_maxsize=16, impersonate="chrome", cancel_token=None):
+        self.cancel_token = cancel_token
+        if cancel_token is not None:
+            self.session = cancellable_session(cancel_token, pool_maxsize)
+        else:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+        
+        # curl_cffi 会话默认每个线程一个curl句柄，每个句柄自带连接缓存
+        self.cffi_session = cffi_requests.Session(impersonate=impersonate)
+        self._cffi_stats = {}  # host -> [请求数, 新建连接数]
+        self._cffi_ports = {}  # (线程, host) -> 上次使用的本地端口
+        self._lock = threading.Lock()
+        # 执行 curl 传输的线程，线程常驻以保留各自的curl句柄和连接
+        self._cffi_executor = None
+        if cancel_token is not None:
+            self._cffi_executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix="curl")
+
+    def request(self, method, url, impersonate=False, **kwargs):
+        """发送请求，参数与 requests 一致"""
+        if impersonate:
+            if self._cffi_executor is None:
+                return self._cffi_request(method, url, **kwargs)
+            self.cancel_token.check()
+            return self.cancel_token.result(self._cffi_executor.submit(self._cffi_request, method, url, **kwargs))
+        return self.session.request(method, url, **kwargs)
+
+    def _cffi_request(self, method, url, **kwargs):
+        response = self.cffi_session.request(method, url, **kwargs)
+        self._record_cffi_connection(url, response)
+        return response
+
+    def get(self, url, impersonate=False, **kwargs):
+        return self.request('GET', url, impersonate=impersonate, **kwargs)
+
+    def post(self, url, impersonate=False, **kwargs):
+        return self.request('POST', url, impersonate=impersonate, **kwargs)
+
+    def _record_cffi_connection(self, url, response):
+        """curl不直接暴露连接复用信息：同一线程访问同一主机时本地端口不变即视为复用"""
+        host = get_host(url)
+        local_port = getattr(response, 'local_port', None)
+        key = (threading.get_ident(), host)
+        with self._lock:
+            stats = self._cffi_stats.setdefault(host, [0, 0])
+            stats[0] += 1
+            if local_port is None or self._cffi_ports.get(key) != local_port:
+                stats[1] += 1
+            self._cffi_ports[key] = local_port
+
+    def connection_stats(self):
+        """返回 {host: {'requests': 请求数, 'new_connections': 新建连接数, 'reused': 复用次数}}"""
+        totals = {}
+        
+        def add(host, requests_count, connections_count):
+            stats = totals.setdefault(host, {'requests': 0, 'new_connections': 0})
+            stats['requests'] += requests_count
+            stats['new_connections'] += connections_count
+        
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    default_port = 443 if key.key_scheme == 'https' else 80
+                    host = pool.host if pool.port in (None, default_port) else f"{pool.host}:{pool.port}"
+                    add(host, pool.num_requests, pool.num_connections)
+        
+        with self._lock:
+            for host, (requests_count, connections_count) in self._cffi_stats.items():
+                add(host, requests_count, connections_count)
+        
+        for stats in totals.values():
+            stats['reused'] = stats['requests'] - stats['new_connections']
+        return totals
+
+    def close(self):
+        """关闭所有连接池"""
+        if self._cffi_executor is not None:
+            self._cffi_executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+        self.cffi_session.close()
+
+
+class CrawlStore:
+    """
+    增量爬取的持久化索引（SQLite）：按关键词记录每篇文章的URL、列表信息哈希、
+    正文哈希和生成的文档路径。再次爬取时只处理新增或内容有变化的文章。
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "keyword TEXT NOT NULL, url TEXT NOT NULL, title TEXT, "
+                "list_hash TEXT, content_hash TEXT, doc_path TEXT, updated_at REAL, "
+                "PRIMARY KEY (keyword, url))"
+            )
+
+    @staticmethod
+    def hash_data(data):
+        """计算任意可JSON序列化数据的稳定哈希"""
+        payload = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, keyword, url):
+        """查询文章记录，不存在时返回None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT title, list_hash, content_hash, doc_path, updated_at FROM articles WHERE keyword = ? AND url = ?",
+                (keyword, url)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('title', 'list_hash', 'content_hash', 'doc_path', 'updated_at'), row))
+
+    def save(self, keyword, url, title=None, list_hash=None, content_hash=None, doc_path=None):
+        """新增或更新文章记录"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO articles (keyword, url, title, list_hash, content_hash, doc_path, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (keyword, url, title, list_hash, content_hash, doc_path, time.time())
+            )
+
+    def count(self, keyword):
+        """关键词下已记录的文章数"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM articles WHERE keyword = ?", (keyword,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class BloomFilter:
+    """
+    紧凑的集合成员过滤器：判断元素"一定不在"或"可能在"集合中。
+    误判率 1% 时每个元素约占 1.2 字节，百万级URL只需一兆多内存。
+    """
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        """双重哈希生成 hash_count 个比特位置"""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class UrlFrontier:
+    """
+    持久化的链接待办队列（SQLite）：以规范化URL为键，记录每个链接的状态——
+    已发现(discovered)、处理中(in_progress)、已完成(done)、失败(failed)。
+    程序中断后再次运行时跳过已完成的链接，从未完成的链接继续处理。
+    每个链接可以带多个标签（如匹配到它的搜索关键词）。
+    内存中只保留一个布隆过滤器，用于不查询数据库就判断链接是否为新链接。
+    """
+    DISCOVERED = 'discovered'
+    IN_PROGRESS = 'in_progress'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, db_path, capacity=1000000, error_rate=0.01):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS frontier ("
+                "id INTEGER PRIMARY KEY, url_key TEXT NOT NULL UNIQUE, url TEXT NOT NULL, title TEXT, "
+                "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, "
+                "discovered_at REAL, updated_at REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS frontier_status ON frontier (status, id)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS frontier_meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS frontier_tags ("
+                "url_key TEXT NOT NULL, tag TEXT NOT NULL, PRIMARY KEY (url_key, tag))"
+            )
+            
+            # 用已有条目构建布隆过滤器，容量随条目数增长
+            total = self.conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+            self._bloom = BloomFilter(max(capacity, total * 2), error_rate)
+            for (url_key,) in self.conn.execute("SELECT url_key FROM frontier"):
+                self._bloom.add(url_key)
+
+    @staticmethod
+    def normalize_url(url):
+        """
+        规范化URL作为去重键：忽略协议、查询参数和片段，主机名小写并去掉默认端口，
+        合并路径中重复的斜杠
+        """
+        parsed = urlparse(url.strip())
+        host = parsed.netloc.lower()
+        if host.endswith(':80') or host.endswith(':443'):
+            host = host.rsplit(':', 1)[0]
+        path = re.sub(r'/{2,}', '/', parsed.path) or '/'
+        return host + path
+
+    def seen(self, url):
+        """链接是否已经在队列中（任意状态）"""
+        url_key = self.normalize_url(url)
+        if url_key not in self._bloom:
+            return False
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM frontier WHERE url_key = ?", (url_key,)).fetchone() is not None
+
+    def add(self, url, title=None):
+        """加入新发现的链接，已存在时保持原状态不变，返回是否为新链接"""
+        url_key = self.normalize_url(url)
+        now = time.time()
+        with self._lock, self.conn:
+            # 布隆过滤器判断为新链接时可以省去存在性检查
+            if url_key in self._bloom and self.conn.execute(
+                    "SELECT 1 FROM frontier WHERE url_key = ?", (url_key,)).fetchone():
+                return False
+            self.conn.execute(
+                "INSERT OR IGNORE INTO frontier (url_key, url, title, status, discovered_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url_key, url, title, self.DISCOVERED, now, now)
+            )
+            self._bloom.add(url_key)
+            return True
+
+    def tag(self, url, tag):
+        """给链接加上标签，返回该标签是否为新加的"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO frontier_tags (url_key, tag) VALUES (?, ?)",
+                (self.normalize_url(url), tag)
+            )
+            return cursor.rowcount > 0
+
+    def get_tags(self, url):
+        """按添加顺序返回链接的全部标签"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT tag FROM frontier_tags WHERE url_key = ? ORDER BY rowid", (self.normalize_url(url),)
+            ).fetchall()
+        return [tag for (tag,) in rows]
+
+    def iter_tagged(self):
+        """按发现顺序返回带标签的链接：(url, title, status, [标签])"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT f.id, f.url, f.title, f.status, t.tag FROM frontier f "
+                "JOIN frontier_tags t ON t.url_key = f.url_key ORDER BY f.id, t.rowid"
+            ).fetchall()
+        for _, group in itertools.groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            yield group[0][1], group[0][2], group[0][3], [row[4] for row in group]
+
+    def iter_pending(self, max_attempts=3, batch_size=500):
+        """
+        按发现顺序逐批返回尚未完成的链接（包括上次运行中断时处理中的链接），
+        失败次数达到 max_attempts 的链接不再返回
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT id, url, title, status, attempts FROM frontier "
+                    "WHERE id > ? AND status != ? AND attempts < ? ORDER BY id LIMIT ?",
+                    (last_id, self.DONE, max_attempts, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(('id', 'url', 'title', 'status', 'attempts'), row))
+            last_id = rows[-1][0]
+
+    def count_pending(self, max_attempts=3):
+        """尚未完成且还可以重试的链接数"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status != ? AND attempts < ?",
+                (self.DONE, max_attempts)
+            ).fetchone()[0]
+
+    def count_exhausted(self, max_attempts=3):
+        """失败次数已达上限、不再重试的链接数"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status != ? AND attempts >= ?",
+                (self.DONE, max_attempts)
+            ).fetchone()[0]
+
+    def counts(self):
+        """返回 {状态: 链接数}"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall())
+
+    def mark(self, url, status, error=None):
+        """
+        更新链接状态，标记为失败时累加失败次数；
+        处理中被停止的链接不计次数，下次运行时照常继续处理
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE frontier SET status = ?, error = ?, updated_at = ?, "
+                "attempts = attempts + (CASE WHEN ? = ? THEN 1 ELSE 0 END) WHERE url_key = ?",
+                (status, error, time.time(), status, self.FAILED, self.normalize_url(url))
+            )
+
+    def get_meta(self, key, default=None):
+        """读取队列附带的键值信息（如列表是否完整翻过一遍）"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM frontier_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO frontier_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class CachedResponse:
+    """HttpCache 返回的响应，接口与 requests.Response 的常用部分一致"""
+    def __init__(self, status_code, content, encoding=None, headers=None, from_cache=False, not_modified=False, extra=None):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers or {}
+        self.from_cache = from_cache  # 内容来自磁盘缓存
+        self.not_modified = not_modified  # 缓存仍然有效（未过期或服务器返回304）
+        self.extra = extra or {}  # 调用方通过 HttpCache.annotate 附加的信息
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class HttpCache:
+    """
+    按URL缓存页面的磁盘缓存。有效期(ttl)内直接返回缓存；过期后带
+    If-None-Match / If-Modified-Since 重新验证，服务器返回304时沿用缓存，
+    调用方可据此跳过下载和重新解析。总大小超过上限时淘汰最久未使用的条目。
+    """
+    def __init__(self, cache_dir, ttl=86400, max_bytes=500 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = {}  # key -> [大小, 最近访问时间]
+        self._total_bytes = 0
+        
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        
+        # 从磁盘恢复索引，元数据文件的修改时间即最近访问时间
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith('.json'):
+                key = entry.name[:-5]
+                body_path = os.path.join(cache_dir, key + '.body')
+                if os.path.exists(body_path):
+                    size = os.path.getsize(body_path) + entry.stat().st_size
+                    self._index[key] = [size, entry.stat().st_mtime]
+                    self._total_bytes += size
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, key + '.body'), os.path.join(self.cache_dir, key + '.json')
+
+    def _load(self, url):
+        """读取缓存条目，返回 (元数据, 内容)，不存在时返回 (None, None)"""
+        key = self._key(url)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        
+        # 记录访问时间，供LRU淘汰使用
+        now = time.time()
+        with self._lock:
+            if key in self._index:
+                self._index[key][1] = now
+        try:
+            os.utime(meta_path, (now, now))
+        except OSError:
+            pass
+        return meta, body
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+    def _store(self, url, response, extra=None):
+        key = self._key(url)
+        body_path, meta_path = self._paths(key)
+        meta = {
+            'url': url,
+            'stored_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding,
+            'extra': extra or {}
+        }
+        
+        tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, body_path)
+        self._write_meta(meta_path, meta)
+        
+        size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+        with self._lock:
+            old_size = self._index.get(key, [0])[0]
+            self._index[key] = [size, time.time()]
+            self._total_bytes += size - old_size
+        self._evict()
+        return meta
+
+    def _evict(self):
+        """总大小超过上限时，按最近访问时间从旧到新删除条目"""
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            victims = []
+            for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                victims.append(key)
+                self._total_bytes -= size
+                del self._index[key]
+        
+        for key in victims:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def annotate(self, url, **extra):
+        """为已缓存的URL附加信息（例如生成的文档路径），随缓存一起保存"""
+        key = self._key(url)
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            meta.setdefault('extra', {}).update(extra)
+            self._write_meta(meta_path, meta)
+        except (OSError, ValueError):
+            pass
+
+    def _prepare(self, url, headers):
+        """
+        请求前查询缓存：有效期内返回 (None, None, 缓存响应)；
+        否则返回 (元数据, 缓存内容, None)，并在 headers 中加入条件请求头
+        """
+        meta, body = self._load(url)
+        if meta is None:
+            return None, None, None
+        
+        if time.time() - meta['stored_at'] < self.ttl:
+            return None, None, CachedResponse(200, body, meta.get('encoding'), from_cache=True,
+                                              not_modified=True, extra=meta.get('extra'))
+        
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return meta, body, None
+
+    def _finish(self, url, meta, body, response):
+        """处理网络响应：304时续期缓存，200时写入缓存"""
+        if response.status_code == 304 and meta is not None:
+            meta['stored_at'] = time.time()
+            self._write_meta(self._paths(self._key(url))[1], meta)
+            return CachedResponse(200, body, meta.get('encoding'), from_cache=True,
+                                  not_modified=True, extra=meta.get('extra'))
+        
+        extra = None
+        if response.status_code == 200:
+            # 页面更新后保留调用方附加的信息（如该URL对应的文档路径）
+            extra = self._store(url, response, meta.get('extra') if meta else None)['extra']
+        return CachedResponse(response.status_code, response.content, response.encoding, response.headers, extra=extra)
+
+    def fetch(self, get_func, url, headers=None, **kwargs):
+        """通过缓存获取URL，get_func 为 requests.get 或其他兼容的请求函数"""
+        headers = dict(headers or {})
+        meta, body, cached = self._prepare(url, headers)
+        if cached:
+            return cached
+        return self._finish(url, meta, body, get_func(url, headers=headers, **kwargs))
+
+    async def fetch_async(self, get_func, url, headers=None, **kwargs):
+        """fetch 的协程版本，get_func 为 AsyncSession.get 等协程函数"""
+        headers = dict(headers or {})
+        meta, body, cached = self._prepare(url, headers)
+        if cached:
+            return cached
+        return self._finish(url, meta, body, await get_func(url, headers=headers, **kwargs))
+
+
+class ImageStore:
+    """
+    按内容寻址的图片缓存，同时以URL和内容哈希为键：
+    相同URL再次出现时不访问网络，不同URL指向相同内容时只保存一份。
+    磁盘占用超过上限时按最近最少使用淘汰。
+    """
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), timeout=30, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, size INTEGER, last_access REAL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, sha TEXT NOT NULL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS urls_sha ON urls (sha)")
+
+    def _blob_path(self, sha):
+        return os.path.join(self.cache_dir, sha[:2], sha)
+
+    def get(self, url):
+        """按URL读取图片，未缓存时返回None"""
+        with self._lock:
+            row = self.conn.execute("SELECT sha FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        
+        sha = row[0]
+        try:
+            with open(self._blob_path(sha), 'rb') as f:
+                data = f.read()
+        except OSError:
+            # 文件已被删除，清理索引
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM urls WHERE sha = ?", (sha,))
+                self.conn.execute("DELETE FROM blobs WHERE sha = ?", (sha,))
+            return None
+        
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE blobs SET last_access = ? WHERE sha = ?", (time.time(), sha))
+        return data
+
+    def put(self, url, data):
+        """保存图片并返回内容哈希，内容已存在时只记录URL映射"""
+        sha = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(sha)
+        
+        with self._lock:
+            exists = self.conn.execute("SELECT 1 FROM blobs WHERE sha = ?", (sha,)).fetchone()
+        
+        if not exists or not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+        
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO blobs (sha, size, last_access) VALUES (?, ?, ?)",
+                              (sha, len(data), time.time()))
+            self.conn.execute("INSERT OR REPLACE INTO urls (url, sha) VALUES (?, ?)", (url, sha))
+        
+        self._evict()
+        return sha
+
+    def _evict(self):
+        """总大小超过上限时，删除最久未使用的图片及其URL映射"""
+        with self._lock, self.conn:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            
+            victims = []
+            for sha, size in self.conn.execute("SELECT sha, size FROM blobs ORDER BY last_access"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(sha)
+                total -= size
+            
+            self.conn.executemany("DELETE FROM urls WHERE sha = ?", [(sha,) for sha in victims])
+            self.conn.executemany("DELETE FROM blobs WHERE sha = ?", [(sha,) for sha in victims])
+        
+        for sha in victims:
+            try:
+                os.remove(self._blob_path(sha))
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class AttachmentStore(ImageStore):
+    """
+    附件的内容寻址存储，索引和淘汰方式与 ImageStore 相同，但以文件为单位，不把内容读入内存。
+    同一URL再次出现时不再下载；结果目录中的附件是指向存储文件的硬链接，
+    多篇文章引用同一份附件（无论URL是否相同）时磁盘上只有一份数据。
+    """
+    @staticmethod
+    def hash_file(path, chunk_size=1024 * 1024):
+        """分块计算文件的SHA-256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def link_or_copy(src, dest):
+        """在 dest 创建指向 src 的硬链接，不支持硬链接（如跨磁盘）时复制，返回是否为硬链接"""
+        tmp_path = f"{dest}.{threading.get_ident()}.tmp"
+        try:
+            os.link(src, tmp_path)
+            linked = True
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+            linked = False
+        os.replace(tmp_path, dest)
+        return linked
+
+    def same_content(self, path, sha):
+        """path 的内容是否与存储中的 sha 相同（硬链接时不必读取文件）"""
+        blob_path = self._blob_path(sha)
+        try:
+            if os.path.samefile(path, blob_path):
+                return True
+            return os.path.getsize(path) == os.path.getsize(blob_path) and self.hash_file(path) == sha
+        except OSError:
+            return False
+
+    def get_path(self, url):
+        """按URL查找已下载的附件，返回 (内容哈希, 存储中的文件路径)，未记录时返回None"""
+        with self._lock:
+            row = self.conn.execute("SELECT sha FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        
+        sha = row[0]
+        blob_path = self._blob_path(sha)
+        if not os.path.exists(blob_path):
+            # 文件已被删除，清理索引
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM urls WHERE sha = ?", (sha,))
+                self.conn.execute("DELETE FROM blobs WHERE sha = ?", (sha,))
+            return None
+        
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE blobs SET last_access = ? WHERE sha = ?", (time.time(), sha))
+        return sha, blob_path
+
+    def put_file(self, url, path):
+        """
+        登记已下载到 path 的附件，返回内容哈希。
+        内容第一次出现时把 path 硬链接到存储中；已存在相同内容时把 path 替换为指向它的硬链接
+        """
+        sha = self.hash_file(path)
+        size = os.path.getsize(path)
+        blob_path = self._blob_path(sha)
+        
+        if os.path.exists(blob_path):
+            if not os.path.samefile(path, blob_path):
+                self.link_or_copy(blob_path, path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            self.link_or_copy(path, blob_path)
+        
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO blobs (sha, size, last_access) VALUES (?, ?, ?)",
+                              (sha, size, time.time()))
+            self.conn.execute("INSERT OR REPLACE INTO urls (url, sha) VALUES (?, ?)", (url, sha))
+        
+        self._evict()
+        return sha
+
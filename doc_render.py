@@ -0,0 +1,190 @@
+"""
+Word文档渲染：把已提取的正文和已下载的图片生成 .docx 文件。
+渲染函数只依赖传入的数据，可以在子进程中执行；DocRenderer 负责进程池，
+以及抓取与渲染之间的有界队列。
+"""
+import io
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from docx import Document
+from docx.shared import Inches
+
+# 默认渲染进程数：留一个核心给抓取和界面
+DEFAULT_RENDER_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+def render_article_doc(doc_path, title, date, nickname, content_elements, images):
+    """
+    按东方财富文章的版式生成并保存文档：标题、发布日期、作者，正文文本和图片按原位置排列
+    images 为 {图片URL: 图片数据}，返回 [(级别, 日志消息)]
+    """
+    messages = []
+    doc = Document()
+
+    # 添加标题
+    if title:
+        doc.add_heading(title, level=1)
+
+    # 添加发布日期和作者
+    if date:
+        doc.add_paragraph(f"发布日期: {date}")
+    if nickname:
+        doc.add_paragraph(f"作者: {nickname}")
+
+    doc.add_paragraph()  # 空行
+
+    # 处理内容元素
+    current_paragraph = doc.add_paragraph()
+    image_index = 0
+
+    for element in content_elements:
+        if element['type'] == 'text':
+            # 添加文本到当前段落
+            current_paragraph.add_run(element['content'] + ' ')
+        elif element['type'] == 'newline':
+            # 开始新段落
+            current_paragraph = doc.add_paragraph()
+        elif element['type'] == 'image':
+            # 插入已下载的图片
+            image_index += 1
+            img_data = images.get(element['src'])
+            if img_data:
+                try:
+                    # 在图片前添加换行
+                    if current_paragraph.text.strip():
+                        current_paragraph = doc.add_paragraph()
+
+                    # 添加图片到文档
+                    current_paragraph.add_run().add_picture(io.BytesIO(img_data), width=Inches(6))
+
+                    # 添加图片描述（如果有）
+                    if element.get('alt'):
+                        desc_paragraph = doc.add_paragraph()
+                        desc_paragraph.add_run(f"图片描述: {element['alt']}").italic = True
+
+                    # 图片后添加空行
+                    current_paragraph = doc.add_paragraph()
+                    messages.append(("DEBUG", f"成功插入图片 {image_index}"))
+                except Exception as e:
+                    messages.append(("WARNING", f"添加图片到文档时出错: {e}"))
+                    # 添加图片占位符
+                    current_paragraph.add_run(f"[图片加载失败: {element.get('alt', '')}]")
+            else:
+                # 添加图片占位符
+                current_paragraph.add_run(f"[图片下载失败: {element.get('alt', '')}]")
+
+    doc.save(doc_path)
+    return messages
+
+
+def render_text_doc(doc_path, text, images, keywords=None):
+    """
+    按人民银行文章的版式生成并保存文档：正文文本每行一段，图片依次放在文本之后
+    images 为 [(图片地址, 图片数据或None)]，keywords 写入文档属性中的关键词（标记），
+    返回 [(级别, 日志消息)]
+    """
+    messages = []
+    doc = Document()
+    if keywords:
+        doc.core_properties.keywords = '; '.join(keywords)
+    lines = [line.strip() for line in text.split('\n') if line.strip()] if text else []
+
+    for line in lines:
+        doc.add_paragraph(line)
+
+    if images:
+        successful_images = 0
+        for img_src, image_content in images:
+            if image_content:
+                try:
+                    # 直接从内存添加到Word文档，不落临时文件
+                    doc.add_picture(io.BytesIO(image_content), width=Inches(6))
+                    successful_images += 1
+                except Exception as e:
+                    messages.append(("WARNING", f"处理图片文件失败 {img_src}: {e}"))
+                    doc.add_paragraph(f"[图片加载失败: {img_src}]")
+            else:
+                doc.add_paragraph(f"[图片下载失败: {img_src}]")
+
+        doc.save(doc_path)
+        messages.append(("INFO", f"文档已保存为: {doc_path}，图片下载成功率: {successful_images}/{len(images)}"))
+    elif lines:
+        doc.save(doc_path)
+        messages.append(("INFO", f"文档已保存为: {doc_path}，共 {len(lines)} 行文本"))
+    else:
+        messages.append(("WARNING", "警告：没有提取到任何文本内容"))
+        # 保存一个包含提示信息的文档
+        doc.add_paragraph("该页面没有提取到任何文本内容")
+        doc.save(doc_path)
+
+    return messages
+
+
+class DocRenderer:
+    """
+    文档渲染阶段：渲染任务提交到进程池，在多个CPU核心上并行生成文档，抓取线程不必等待。
+    在途任务数达到 max_pending 时 submit 阻塞，相当于抓取与渲染之间的有界队列：
+    渲染跟不上时抓取自动放慢，内存中积压的正文和图片数量有上限。
+    workers 为 0 时在调用线程中直接渲染。
+    """
+    def __init__(self, workers=DEFAULT_RENDER_WORKERS, max_pending=None, log_callback=None):
+        self.log = log_callback if log_callback else (lambda message, level="INFO": None)
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_pending or max(1, workers) * 2)
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    def submit(self, func, *args, callback=None):
+        """
+        提交渲染任务，返回 Future。在途任务已满时阻塞直到有任务完成。
+        callback(future) 在任务完成后调用，drain 会等待回调执行完毕
+        """
+        self._slots.acquire()
+        with self._condition:
+            self._pending += 1
+
+        future = None
+        if self.executor is not None:
+            try:
+                future = self.executor.submit(func, *args)
+            except (BrokenProcessPool, RuntimeError) as e:
+                # 渲染进程异常退出时退回到当前线程渲染，不中断爬取
+                self.log(f"渲染进程池不可用，改为在当前线程生成文档: {e}", "WARNING")
+                self.executor = None
+
+        if future is None:
+            future = Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+        future.add_done_callback(lambda done: self._finish(done, callback))
+        return future
+
+    def _finish(self, future, callback):
+        try:
+            if callback:
+                callback(future)
+        except Exception as e:
+            self.log(f"处理文档生成结果时出错: {e}", "WARNING")
+        finally:
+            self._slots.release()
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+
+    def drain(self):
+        """等待所有已提交的渲染任务及其回调完成"""
+        with self._condition:
+            while self._pending:
+                self._condition.wait()
+
+    def close(self):
+        """等待在途任务完成后关闭进程池"""
+        self.drain()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
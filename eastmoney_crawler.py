@@ -1,45 +1,156 @@
-from curl_cffi import requests as cffi_requests
 import requests
 import json
 import time
 import re
 import os
 import random
-from bs4 import BeautifulSoup
-from docx import Document
-from docx.shared import Inches
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 import urllib.parse
 from PIL import Image
-import io
 import math
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from curl_cffi.requests import AsyncSession
+from doc_render import DocRenderer, render_article_doc, DEFAULT_RENDER_WORKERS
+from crawler_utils import (HostRateLimiter, RetryPolicy, HttpTransport, CrawlStore, HttpCache, ImageStore, CancelToken,
+                           CircuitOpenError, EventBus, CrawlProgress, get_host, reserve_doc_path, release_doc_path,
+                           DEFAULT_HTML_PARSER)
+
+# 文章页标题和正文所在区域，通常只需解析这两部分
+ARTICLE_REGION_STRAINER = SoupStrainer(attrs={'class': re.compile(r'(^|\s)(article-title|xeditor_content)(\s|$)')})
 
 class EastMoneyCrawler:
-    def __init__(self, log_callback=None):
+    def __init__(self, log_callback=None, cancel_token=None, log_level='INFO'):
+        """
+        cancel_token 为与界面共享的取消令牌，不指定时自己创建
+        log_callback(消息, 级别) 作为事件订阅者接收不低于 log_level 的事件，
+        其他消费者（如日志文件）可以通过 self.events.subscribe 订阅
+        """
         self.log_callback = log_callback if log_callback else print
-        self.is_crawling = True  # 添加爬虫状态控制
+        self.events = EventBus()
+        self.events.subscribe(lambda event: self.log_callback(event.message, event.level), log_level)
+        # emit(类型, 级别, 模板, **字段) 发出结构化事件，消息在订阅者读取时才格式化，
+        # 没有订阅者接收该级别时直接返回；循环中的频繁日志使用它，直接绑定以省去一层调用
+        self.emit = self.events.emit
+        self.progress = CrawlProgress()  # 进度计数，界面定时读取
+        self._owns_cancel_token = cancel_token is None
+        self.cancel_token = cancel_token if cancel_token else CancelToken()  # 爬虫状态控制
+        self.store = None  # 增量索引，在 crawl_keyword 中打开
+        self.renderer = None  # 文档渲染阶段，在 crawl_keyword 中启动
+        self._host_semaphores = {}  # host -> 图片并发下载信号量
+        self._host_semaphores_lock = threading.Lock()
         
         # 全局配置
         self.config = {
             'min_delay': 1,  # 最小延迟时间(秒)
             'max_delay': 3,  # 最大延迟时间(秒)
             'max_retries': 3,  # 最大重试次数
+            'retry_base_delay': 1.0,  # 重试退避的初始等待(秒)，每次重试翻倍
+            'retry_max_delay': 30.0,  # 重试退避的最长等待(秒)
+            'breaker_threshold': 5,  # 同一主机连续失败多少次后暂停请求
+            'breaker_cooldown': 60.0,  # 主机暂停请求的时长(秒)
             'timeout': 15,  # 请求超时时间(秒)
+            'html_parser': DEFAULT_HTML_PARSER,  # BeautifulSoup解析器：lxml 或 html.parser
+            'incremental': True,  # 增量模式：跳过已爬取且未变化的文章
+            'store_name': 'crawl_index.db',  # 增量索引文件名，保存在结果目录下
+            'http_cache_dir': os.path.join('cache', 'http'),  # 文章页面磁盘缓存目录，为空时不缓存
+            'http_cache_ttl': 24 * 3600,  # 缓存有效期(秒)，过期后向服务器重新验证
+            'http_cache_max_mb': 500,  # 缓存总大小上限(MB)
+            'image_cache_dir': os.path.join('cache', 'images'),  # 图片缓存目录（与人民银行爬虫共用），为空时不缓存
+            'image_cache_max_mb': 1024,  # 图片缓存总大小上限(MB)
+            'page_size_candidates': [100, 50, 20, 10],  # 依次尝试的每页条数，从大到小
+            'list_workers': 4,  # 并发获取搜索页的线程数
+            'list_breaker_waits': 3,  # 搜索页所在主机熔断时最多等待几次冷却后重试，仍熔断则放弃该页
+            'list_min_interval': 0.2,  # 同一主机列表请求的最小间隔(秒)
+            'list_max_interval': 0.5,  # 同一主机列表请求的最大间隔(秒)
+            'image_workers': 8,  # 单篇文章并发下载图片的线程数
+            'image_per_host': 4,  # 同一图片主机的并发下载上限
+            'fetch_min_interval': 0.05,  # 异步引擎同一主机文章/图片请求的最小间隔(秒)
+            'fetch_max_interval': 0.2,  # 异步引擎同一主机文章/图片请求的最大间隔(秒)
+            'async_workers': 16,  # 异步引擎同时处理的文章数
+            'async_concurrency': 64,  # 异步引擎在途请求数上限
+            'render_workers': DEFAULT_RENDER_WORKERS,  # 生成Word文档的进程数，0 表示在抓取线程中生成
+            'render_queue_size': 16,  # 等待生成的文档数上限，达到后抓取暂停
+        }
+        
+        # 按主机共享的限速器，取代翻页前的固定等待
+        self.rate_limiter = HostRateLimiter(self.config['list_min_interval'], self.config['list_max_interval'],
+                                            sleep_func=self.cancel_token.sleep)
+        self.fetch_rate_limiter = HostRateLimiter(self.config['fetch_min_interval'], self.config['fetch_max_interval'],
+                                                  sleep_func=self.cancel_token.sleep)
+        
+        # 列表、文章、图片请求共用的重试策略和按主机熔断
+        self.retry_policy = RetryPolicy(
+            max_retries=self.config['max_retries'],
+            base_delay=self.config['retry_base_delay'],
+            max_delay=self.config['retry_max_delay'],
+            breaker_threshold=self.config['breaker_threshold'],
+            breaker_cooldown=self.config['breaker_cooldown'],
+            sleep_func=self.cancel_token.sleep,
+            log_callback=lambda message, level="INFO": self.events.emit('retry', level, message)
+        )
+        
+        # 文章页和图片请求头，同步与异步引擎共用
+        self.article_headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+            'Referer': 'https://so.eastmoney.com/',
+        }
+        self.image_headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0',
+            'Referer': 'https://www.eastmoney.com/'
         }
+        
+        # 列表、文章、图片请求共用的连接池
+        self.transport = HttpTransport(pool_maxsize=self.config['list_workers'] * 2, cancel_token=self.cancel_token)
+        
+        # 文章页面磁盘缓存
+        self.http_cache = None
+        if self.config['http_cache_dir']:
+            self.http_cache = HttpCache(self.config['http_cache_dir'], self.config['http_cache_ttl'],
+                                        self.config['http_cache_max_mb'] * 1024 * 1024)
+        
+        # 跨文章、跨运行共享的图片缓存
+        self.image_store = None
+        if self.config['image_cache_dir']:
+            self.image_store = ImageStore(self.config['image_cache_dir'], self.config['image_cache_max_mb'] * 1024 * 1024)
     
+    @property
+    def is_crawling(self):
+        """爬取状态由取消令牌决定：令牌取消后等待立即结束，在途请求随即中断"""
+        return not self.cancel_token.cancelled
+
+    @is_crawling.setter
+    def is_crawling(self, value):
+        if not value:
+            self.cancel_token.cancel()
+        elif self._owns_cancel_token:
+            # 外部传入的令牌由调用方决定是否取消，不在这里恢复
+            self.cancel_token.reset()
+
+    def close(self):
+        """释放渲染进程、连接池（含 curl 传输线程）和数据库连接，爬虫不再使用后调用"""
+        self.close_renderer()
+        self.close_store()
+        self.transport.close()
+        if self.image_store:
+            self.image_store.close()
+            self.image_store = None
+
     def stop_crawling(self):
         """停止爬取"""
         self.is_crawling = False
         self.log("收到停止信号", "WARNING")
     
     def log(self, message, level="INFO"):
-        """日志记录"""
-        self.log_callback(f"{message}", level)
+        """日志记录：发出已格式化好的普通日志事件"""
+        self.events.emit('log', level, str(message))
     
-    def get_articles_list(self, keyword, page_index=1, page_size=10, retry_count=0):
-        """获取文章列表，包含重试机制"""
-        if not self.is_crawling:
-            return None
-            
+    def build_list_request(self, keyword, page_index=1, page_size=10):
+        """构建搜索列表请求，返回 (url, params, headers)，同步与异步引擎共用"""
         url = "https://search-api-web.eastmoney.com/search/jsonp"
         
         # 构建参数，包含关键词和页码
@@ -90,115 +201,216 @@ class EastMoneyCrawler:
             'sec-ch-ua-platform': '"Windows"'
         }
         
-        try:
-            # 使用curl_cffi发送请求，模拟浏览器指纹
-            response = cffi_requests.get(
-                url, 
-                params=params, 
-                headers=headers, 
-                impersonate="chrome",
-                timeout=self.config['timeout']
-            )
-            
-            self.log(f"第{page_index}页请求状态码: {response.status_code}")
+        return url, params, headers
+
+    def parse_list_response(self, content):
+        """解析搜索列表响应（JSONP或JSON），失败返回None"""
+        if content.startswith('jQuery') and content.endswith(')'):
+            json_str = content[content.find('(')+1:content.rfind(')')]
+            try:
+                data = json.loads(json_str)
+                return data
+            except json.JSONDecodeError as e:
+                self.log(f"JSON解析错误: {e}", "WARNING")
+                return None
+        else:
+            try:
+                data = json.loads(content)
+                return data
+            except:
+                self.log("响应不是JSON或JSONP格式", "WARNING")
+                return None
+
+    def get_articles_list(self, keyword, page_index=1, page_size=10):
+        """获取文章列表，失败时按重试策略重试"""
+        if not self.is_crawling:
+            return None
             
-            # 处理JSONP
-            content = response.text
-            if content.startswith('jQuery') and content.endswith(')'):
-                json_str = content[content.find('(')+1:content.rfind(')')]
-                try:
-                    data = json.loads(json_str)
-                    return data
-                except json.JSONDecodeError as e:
-                    self.log(f"JSON解析错误: {e}", "WARNING")
-                    return None
-            else:
-                try:
-                    data = response.json()
-                    return data
-                except:
-                    self.log("响应不是JSON或JSONP格式", "WARNING")
+        url, params, headers = self.build_list_request(keyword, page_index, page_size)
+        
+        def send(url, **kwargs):
+            # 按主机限速，每次重试同样受限
+            self.rate_limiter.acquire(url)
+            # 使用curl_cffi发送请求，模拟浏览器指纹，复用共享连接
+            return self.transport.get(url, impersonate=True, **kwargs)
+        
+        waits = 0
+        while True:
+            try:
+                response = self.retry_policy.call(
+                    send,
+                    url, 
+                    params=params, 
+                    headers=headers, 
+                    timeout=self.config['timeout']
+                )
+                
+                self.emit('page_fetched', 'DEBUG', "第{page}页请求状态码: {status}", page=page_index, status=response.status_code)
+                
+                # 处理JSONP
+                return self.parse_list_response(response.text)
+            except CircuitOpenError as e:
+                # 列表页丢失意味着整页文章漏爬：等熔断冷却结束后重试该页
+                delay = self.breaker_retry_delay(page_index, e, waits)
+                if delay is None or self.cancel_token.wait(delay):
                     return None
-        except Exception as e:
-            self.log(f"请求文章列表时出错: {e}", "WARNING")
-            
-            # 重试机制
-            if retry_count < self.config['max_retries']:
-                retry_delay = random.uniform(2, 5)  # 重试延迟
-                self.log(f"第{retry_count+1}次重试，等待{retry_delay:.1f}秒...")
-                time.sleep(retry_delay)
-                return self.get_articles_list(keyword, page_index, page_size, retry_count+1)
-            else:
-                self.log(f"已达到最大重试次数({self.config['max_retries']})，放弃请求", "ERROR")
+                waits += 1
+            except Exception as e:
+                self.log(f"请求文章列表失败，放弃请求: {e}", "ERROR")
                 return None
 
-    def get_all_articles(self, keyword):
-        """获取所有页面的文章 - 解除页数限制"""
-        if not self.is_crawling:
-            return []
+    def breaker_retry_delay(self, page_index, error, waits):
+        """
+        搜索页所在主机熔断时，返回等待冷却结束后重试该页前需要等待的秒数；
+        已等待 list_breaker_waits 次时放弃该页，返回None
+        """
+        if waits >= self.config['list_breaker_waits']:
+            self.log(f"第{page_index}页所在主机持续熔断，放弃请求: {error}", "ERROR")
+            return None
+        self.log(f"第{page_index}页所在主机熔断中，{error.retry_after:.0f}秒后重试该页", "WARNING")
+        return error.retry_after
+
+    def report_failed_pages(self, failed_pages):
+        """列表有页面最终获取失败时报告本次爬取不完整"""
+        if failed_pages and self.is_crawling:
+            self.log(f"文章列表不完整：{len(failed_pages)} 页获取失败（第{', '.join(map(str, failed_pages[:20]))}"
+                     f"{' 等' if len(failed_pages) > 20 else ''}页），这些页面的文章没有处理，请稍后重新爬取", "ERROR")
+
+    def check_page_size(self, page_size, page_data):
+        """
+        判断服务器是否接受该每页条数：响应正常，且返回条数达到
+        min(每页条数, 总条数)。服务器静默截断时返回条数会偏少，视为不接受。
+        """
+        if not page_data or 'result' not in page_data or not isinstance(page_data['result'].get('article'), list):
+            return False
+        
+        returned = len(page_data['result']['article'])
+        expected = min(page_size, page_data.get('hitsTotal', 0))
+        return returned >= expected
+
+    def probe_page_size(self, keyword):
+        """
+        用第一页请求探测接口接受的最大每页条数，被拒绝时依次回退到更小的值。
+        返回 (每页条数, 第一页数据)，全部失败时返回 (None, None)。
+        """
+        for page_size in self.config['page_size_candidates']:
+            if not self.is_crawling:
+                break
+            
+            page_data = self.get_articles_list(keyword, 1, page_size)
+            if self.check_page_size(page_size, page_data):
+                self.log(f"使用每页 {page_size} 条")
+                return page_size, page_data
             
-        all_articles = []
+            self.log(f"接口不接受每页 {page_size} 条，尝试更小的值", "WARNING")
         
-        # 先获取第一页，了解总条数和页数
+        return None, None
+
+    def fetch_pages_concurrently(self, keyword, pages, page_size=10):
+        """
+        并发获取多个搜索页，同时在途的请求数不超过 list_workers，
+        请求频率由共享的按主机限速器控制。按页码顺序产出 (page, data)，
+        单页失败时 data 为 None，不影响其他页。
+        """
+        workers = max(1, self.config['list_workers'])
+        window = workers * 2  # 预提交的页数，保证线程池始终有活可干
+        pages = iter(pages)
+        pending = []  # 按页码顺序排列的 (page, future)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eastmoney-list") as executor:
+            try:
+                while True:
+                    # 补满在途窗口
+                    while self.is_crawling and len(pending) < window:
+                        page = next(pages, None)
+                        if page is None:
+                            break
+                        pending.append((page, executor.submit(self.get_articles_list, keyword, page, page_size)))
+                    
+                    if not pending:
+                        break
+                    
+                    page, future = pending.pop(0)
+                    try:
+                        page_data = future.result()
+                    except Exception as e:
+                        self.log(f"第{page}页请求异常: {e}", "WARNING")
+                        page_data = None
+                    yield page, page_data
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def iter_articles(self, keyword):
+        """
+        按页码顺序逐页产出文章，供 process_articles 边获取边处理。
+        后续页面在后台并发预取，内存中最多保留一个预取窗口的页面。
+        总条数写入 self.total_hits，供进度显示使用。
+        """
+        self.total_hits = 0
+        if not self.is_crawling:
+            return
+        
+        # 先获取第一页，了解总条数和页数，同时确定每页条数
         self.log(f"正在搜索关键词: {keyword}")
-        first_page_data = self.get_articles_list(keyword, 1, 10)
+        page_size, first_page_data = self.probe_page_size(keyword)
         
         if not first_page_data:
             self.log("获取第一页数据失败", "ERROR")
-            return []
+            return
         
         # 获取总条数
         total_count = first_page_data.get('hitsTotal', 0)
+        self.total_hits = total_count
         self.log(f"找到 {total_count} 条相关文章")
         
         if total_count == 0:
             self.log("没有找到相关文章", "WARNING")
-            return []
+            return
         
         # 计算总页数
-        page_size = 10
         total_pages = math.ceil(total_count / page_size)
         self.log(f"总共 {total_pages} 页")
+        self.progress.set(pages_total=total_pages, articles_total=total_count, pages_listed=1)
         
         # 解除页数限制 - 爬取所有页面
         # 添加进度提示
         if total_pages > 100:
             self.log(f"检测到大量页面({total_pages}页)，爬取可能需要较长时间...", "WARNING")
         
-        max_pages = total_pages  # 爬取所有页
+        listed_count = 0
+        failed_pages = []
         
-        # 添加第一页的文章
+        # 产出第一页的文章
         if 'result' in first_page_data and 'article' in first_page_data['result']:
             articles = first_page_data['result']['article']
-            all_articles.extend(articles)
+            listed_count += len(articles)
             self.log(f"第1页: 获取到 {len(articles)} 篇文章")
+            yield from articles
         
-        # 获取剩余页面的文章
-        for page in range(2, total_pages + 1):
-            if not self.is_crawling:
-                break
-                
+        # 并发获取剩余页面的文章，结果按页码顺序返回
+        for page, page_data in self.fetch_pages_concurrently(keyword, range(2, total_pages + 1), page_size):
+            self.progress.add(pages_listed=1)
             # 显示进度
             if page % 10 == 0 or page == total_pages:
-                self.log(f"进度: {page}/{total_pages} 页 ({(page/total_pages)*100:.1f}%)")
-                
-            # 随机延迟，避免请求过于频繁
-            delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-            self.log(f"等待{delay:.1f}秒后获取第{page}页...")
-            time.sleep(delay)
-            
-            self.log(f"正在获取第{page}页...")
-            page_data = self.get_articles_list(keyword, page, page_size)
+                self.emit('list_progress', 'INFO', "进度: {page}/{total} 页 ({percent:.1f}%)",
+                          page=page, total=total_pages, percent=page / total_pages * 100)
             
             if page_data and 'result' in page_data and 'article' in page_data['result']:
                 articles = page_data['result']['article']
-                all_articles.extend(articles)
-                self.log(f"第{page}页: 获取到 {len(articles)} 篇文章")
+                listed_count += len(articles)
+                self.emit('page_listed', 'INFO', "第{page}页: 获取到 {count} 篇文章", page=page, count=len(articles))
+                yield from articles
             else:
                 self.log(f"第{page}页获取失败", "WARNING")
+                failed_pages.append(page)
         
-        self.log(f"总共获取到 {len(all_articles)} 篇文章")
-        return all_articles
+        self.log(f"总共获取到 {listed_count} 篇文章")
+        self.report_failed_pages(failed_pages)
+
+    def get_all_articles(self, keyword):
+        """获取所有页面的文章 - 解除页数限制"""
+        return list(self.iter_articles(keyword))
 
     def clean_filename(self, title, max_length=100):
         """
@@ -227,10 +439,26 @@ class EastMoneyCrawler:
         
         return clean_title
 
+    def parse_article_page(self, html_content):
+        """
+        解析文章页面，生成的DOM供标题和正文提取共用。
+        优先只解析标题和正文区域；页面结构不同、找不到这两个区域时再完整解析。
+        """
+        parser = self.config['html_parser']
+        soup = BeautifulSoup(html_content, parser, parse_only=ARTICLE_REGION_STRAINER)
+        if soup.find('h1', class_='article-title') and soup.find('div', class_='xeditor_content cfh_web'):
+            return soup
+        return BeautifulSoup(html_content, parser)
+
+    def extract_article(self, html_content):
+        """解析一次页面，返回 (标题, 正文元素列表)"""
+        soup = self.parse_article_page(html_content)
+        return self.extract_article_title(soup), self.extract_article_content_with_images(soup)
+
     def extract_article_title(self, html_content):
-        """从HTML内容中提取文章标题"""
+        """从HTML内容（或已解析的DOM）中提取文章标题"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = html_content if isinstance(html_content, Tag) else BeautifulSoup(html_content, self.config['html_parser'])
             
             # 查找 h1 标签且 class 为 "article-title"
             title_element = soup.find('h1', class_='article-title')
@@ -265,9 +493,9 @@ class EastMoneyCrawler:
             return None
 
     def extract_article_content_with_images(self, html_content):
-        """从HTML内容中提取文章正文和图片，保留图片位置信息"""
+        """从HTML内容（或已解析的DOM）中提取文章正文和图片，保留图片位置信息"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = html_content if isinstance(html_content, Tag) else BeautifulSoup(html_content, self.config['html_parser'])
             
             # 查找正文内容
             content_div = soup.find('div', class_='xeditor_content cfh_web')
@@ -334,158 +562,278 @@ class EastMoneyCrawler:
             self.log(f"提取正文时出错: {e}", "WARNING")
             return []
 
-    def download_image_to_memory(self, img_url, retry_count=0):
-        """下载图片到内存，包含重试机制"""
+    def download_image_to_memory(self, img_url):
+        """下载图片到内存，失败时按重试策略重试，已缓存的图片不再访问网络"""
         if not self.is_crawling:
             return None
+        
+        if self.image_store:
+            img_data = self.image_store.get(img_url)
+            if img_data is not None:
+                self.progress.add(images=1)
+                return img_data
             
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0',
-                'Referer': 'https://www.eastmoney.com/'
-            }
-            
-            response = requests.get(img_url, headers=headers, timeout=self.config['timeout'])
+            response = self.retry_policy.call(self.transport.get, img_url, headers=self.image_headers,
+                                              timeout=self.config['timeout'])
             if response.status_code == 200:
+                if self.image_store:
+                    self.image_store.put(img_url, response.content)
+                self.progress.add(images=1, bytes=len(response.content))
+                self.emit('image_done', 'DEBUG', "图片已下载: {url} ({size} 字节)", url=img_url, size=len(response.content))
                 return response.content
             else:
                 self.log(f"下载图片失败: {img_url} (状态码: {response.status_code})", "WARNING")
                 return None
         except Exception as e:
-            self.log(f"下载图片时出错: {e}", "WARNING")
-            
-            # 重试机制
-            if retry_count < self.config['max_retries']:
-                retry_delay = random.uniform(1, 3)  # 重试延迟
-                self.log(f"图片下载第{retry_count+1}次重试，等待{retry_delay:.1f}秒...")
-                time.sleep(retry_delay)
-                return self.download_image_to_memory(img_url, retry_count+1)
-            else:
-                self.log(f"图片下载已达到最大重试次数({self.config['max_retries']})，放弃下载", "WARNING")
-                return None
+            self.log(f"下载图片失败，放弃下载: {img_url} ({e})", "WARNING")
+            return None
+
+    def get_host_semaphore(self, url):
+        """获取图片主机对应的并发下载信号量"""
+        host = get_host(url)
+        with self._host_semaphores_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.config['image_per_host'])
+            return self._host_semaphores[host]
+
+    def prefetch_images(self, content_elements):
+        """
+        并发下载文章中的所有图片，返回 {图片URL: 图片数据}（失败为None）。
+        总并发数为 image_workers，同一主机的并发数不超过 image_per_host。
+        """
+        image_urls = list(dict.fromkeys(e['src'] for e in content_elements if e['type'] == 'image'))
+        if not image_urls:
+            return {}
+        
+        def download(img_url):
+            with self.get_host_semaphore(img_url):
+                return self.download_image_to_memory(img_url)
+        
+        self.emit('images_started', 'DEBUG', "并发下载 {count} 张图片...", count=len(image_urls))
+        workers = max(1, min(self.config['image_workers'], len(image_urls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eastmoney-image") as executor:
+            image_data = list(executor.map(download, image_urls))
+        
+        return dict(zip(image_urls, image_data))
 
-    def save_to_doc_with_images(self, article_info, content_elements, doc_save_dir):
-        """将文章内容保存到Word文档，图片直接下载并插入到相应位置"""
+    def prepare_doc(self, article_info, content_elements, doc_save_dir, images=None, doc_path=None):
+        """
+        准备文档渲染所需的数据：并发下载图片（已下载好的 images 直接使用）并预占文档路径
+        doc_path 指定时覆盖该文档（增量模式下更新已有文章），返回 render_article_doc 的参数
+        下载失败的图片数记入 article_info['missing_images']；下载图片期间停止爬取时返回None
+        """
+        # 组装文档前先并发下载本文所有图片
+        if images is None:
+            images = self.prefetch_images(content_elements)
         if not self.is_crawling:
             return None
-            
+        
+        missing = sum(1 for image_data in images.values() if not image_data)
+        article_info['missing_images'] = missing
+        if missing:
+            self.log(f"{missing} 张图片下载失败，文档中以占位文字代替，下次运行时重新处理", "WARNING")
+        
+        title = article_info.get('extracted_title') or article_info.get('list_title')
+        if not doc_path:
+            doc_path = reserve_doc_path(doc_save_dir, self.clean_filename(title))
+        return (doc_path, title, article_info.get('date'), article_info.get('nickname'), content_elements, images)
+
+    def log_messages(self, messages):
+        """输出渲染进程返回的日志"""
+        for level, message in messages:
+            self.log(message, level)
+
+    def save_to_doc_with_images(self, article_info, content_elements, doc_save_dir, images=None, doc_path=None):
+        """
+        将文章内容保存到Word文档，图片先并发下载，再按原位置插入，在当前线程中生成
+        images 为已下载好的 {图片URL: 图片数据} 时直接使用，不再下载
+        doc_path 指定时覆盖该文档（增量模式下更新已有文章）
+        """
+        if not self.is_crawling:
+            return None
+        
+        render_args = None
         try:
-            # 创建文档
-            doc = Document()
-            
-            # 添加标题
-            title = article_info.get('extracted_title') or article_info.get('list_title')
-            if title:
-                doc.add_heading(title, level=1)
-            
-            # 添加发布日期和作者
-            if article_info.get('date'):
-                doc.add_paragraph(f"发布日期: {article_info['date']}")
-            if article_info.get('nickname'):
-                doc.add_paragraph(f"作者: {article_info['nickname']}")
-            
-            doc.add_paragraph()  # 空行
-            
-            # 处理内容元素
-            current_paragraph = doc.add_paragraph()
-            image_index = 0
-            
-            for element in content_elements:
-                if not self.is_crawling:
-                    break
-                    
-                if element['type'] == 'text':
-                    # 添加文本到当前段落
-                    current_paragraph.add_run(element['content'] + ' ')
-                elif element['type'] == 'newline':
-                    # 开始新段落
-                    current_paragraph = doc.add_paragraph()
-                elif element['type'] == 'image':
-                    # 下载图片并插入到文档
-                    image_index += 1
-                    self.log(f"下载并插入图片 {image_index}: {element['src']}")
-                    
-                    # 图片下载前随机延迟
-                    img_delay = random.uniform(0.5, 1.5)
-                    time.sleep(img_delay)
-                    
-                    img_data = self.download_image_to_memory(element['src'])
-                    if img_data:
-                        try:
-                            # 在图片前添加换行
-                            if current_paragraph.text.strip():
-                                current_paragraph = doc.add_paragraph()
-                            
-                            # 将图片数据写入内存流
-                            img_stream = io.BytesIO(img_data)
-                            
-                            # 添加图片到文档
-                            current_paragraph.add_run().add_picture(img_stream, width=Inches(6))
-                            
-                            # 添加图片描述（如果有）
-                            if element.get('alt'):
-                                desc_paragraph = doc.add_paragraph()
-                                desc_paragraph.add_run(f"图片描述: {element['alt']}").italic = True
-                            
-                            # 图片后添加空行
-                            current_paragraph = doc.add_paragraph()
-                            self.log(f"成功插入图片 {image_index}")
-                        except Exception as e:
-                            self.log(f"添加图片到文档时出错: {e}", "WARNING")
-                            # 添加图片占位符
-                            current_paragraph.add_run(f"[图片加载失败: {element.get('alt', '')}]")
-                    else:
-                        # 添加图片占位符
-                        current_paragraph.add_run(f"[图片下载失败: {element.get('alt', '')}]")
-            
-            # 保存文档
-            clean_title = self.clean_filename(title)
-            doc_filename = f"{clean_title}.docx"
-            doc_path = os.path.join(doc_save_dir, doc_filename)
-            
-            # 如果文件名已存在，添加序号
-            counter = 1
-            original_doc_path = doc_path
-            while os.path.exists(doc_path):
-                name, ext = os.path.splitext(original_doc_path)
-                doc_path = f"{name}_{counter}{ext}"
-                counter += 1
-            
-            doc.save(doc_path)
-            return doc_path
+            render_args = self.prepare_doc(article_info, content_elements, doc_save_dir, images, doc_path)
+            if render_args is None:
+                return None
+            self.log_messages(render_article_doc(*render_args))
+            return render_args[0]
             
         except Exception as e:
             self.log(f"保存文档时出错: {e}", "ERROR")
+            if render_args and not doc_path:
+                release_doc_path(render_args[0])
             return None
 
+    def queue_doc(self, article_info, content_elements, doc_save_dir, on_saved, doc_path=None):
+        """
+        把文档交给渲染阶段生成，不等待生成完成：图片下载和路径预占在当前线程进行，
+        文档在渲染进程中生成，完成后调用 on_saved(doc_path)，失败或爬取已停止时调用 on_saved(None)
+        渲染阶段未启动时在当前线程生成
+        """
+        if self.renderer is None:
+            on_saved(self.save_to_doc_with_images(article_info, content_elements, doc_save_dir, doc_path=doc_path))
+            return
+        
+        try:
+            render_args = self.prepare_doc(article_info, content_elements, doc_save_dir, doc_path=doc_path)
+        except Exception as e:
+            self.log(f"保存文档时出错: {e}", "ERROR")
+            on_saved(None)
+            return
+        if render_args is None:
+            on_saved(None)
+            return
+        
+        def finished(future):
+            try:
+                self.log_messages(future.result())
+            except Exception as e:
+                self.log(f"保存文档时出错: {e}", "ERROR")
+                if not doc_path:
+                    release_doc_path(render_args[0])
+                on_saved(None)
+            else:
+                on_saved(render_args[0])
+        
+        self.renderer.submit(render_article_doc, *render_args, callback=finished)
+
+    def open_renderer(self):
+        """启动本次爬取的文档渲染阶段"""
+        self.renderer = DocRenderer(self.config['render_workers'], self.config['render_queue_size'], log_callback=self.log)
+
+    def close_renderer(self):
+        """等待在途文档生成完毕后关闭渲染阶段"""
+        if self.renderer:
+            self.renderer.close()
+            self.renderer = None
+
+    def open_store(self, save_dir):
+        """打开结果目录下的增量索引（增量模式关闭时不打开）"""
+        self.close_store()
+        if self.config['incremental']:
+            if not os.path.exists(save_dir):
+                os.makedirs(save_dir)
+            self.store = CrawlStore(os.path.join(save_dir, self.config['store_name']))
+
+    def close_store(self):
+        if self.store:
+            self.store.close()
+            self.store = None
+
+    def lookup_article(self, keyword, url, save_dir):
+        """
+        查询增量索引中的文章记录，只有文档仍然存在时才返回，
+        记录中的 doc_path 转换为绝对路径
+        """
+        if not self.store:
+            return None
+        
+        record = self.store.get(keyword, url)
+        if not record or not record['doc_path']:
+            return None
+        
+        doc_path = os.path.join(save_dir, record['doc_path'])
+        if not os.path.exists(doc_path):
+            return None
+        
+        record['doc_path'] = doc_path
+        return record
+
+    def skipped_result(self, index, article, record):
+        """未变化而跳过的文章结果"""
+        return {
+            'index': index,
+            'list_title': article['title'],
+            'extracted_title': record['title'],
+            'cleaned_title': self.clean_filename(record['title'] or article['title']),
+            'url': article['url'],
+            'content_elements': [],
+            'status_code': None,
+            'doc_path': record['doc_path'],
+            'skipped': True,
+            'success': True
+        }
+
+    def count_result(self, result):
+        """按文章处理结果累加进度计数"""
+        if result.get('success'):
+            self.progress.add(articles_done=1)
+        else:
+            self.progress.add(articles_failed=1)
+
+    def record_article(self, keyword, article, result, content_hash):
+        """
+        将已生成文档的文章写入增量索引，文档路径按结果目录的相对路径保存
+        处理不成功（如有图片下载失败）的文章只记录文档路径，不记录摘要，
+        下次运行时重新处理并原地更新该文档
+        """
+        if self.store and result.get('doc_path'):
+            complete = result.get('success')
+            self.store.save(
+                keyword, article['url'],
+                title=result.get('extracted_title') or article['title'],
+                list_hash=CrawlStore.hash_data(article) if complete else None,
+                content_hash=content_hash if complete else None,
+                doc_path=os.path.basename(result['doc_path'])
+            )
+
+    def doc_saved(self, keyword, article, result, content_hash, doc_path):
+        """文档生成完成后更新文章结果并写入增量索引，doc_path 为None表示生成失败或爬取已停止"""
+        if doc_path:
+            result['doc_path'] = doc_path
+            self.emit('doc_saved', 'INFO', "已保存文档: {name}", name=os.path.basename(doc_path), path=doc_path)
+            if result.get('missing_images'):
+                result['success'] = False
+                result['error'] = f"{result['missing_images']} 张图片下载失败"
+            self.record_article(keyword, article, result, content_hash)
+        else:
+            if self.is_crawling:
+                self.log("保存文档失败", "WARNING")
+            result['success'] = False
+
+    def fetch_article_page(self, url):
+        """获取文章页面，失败时按重试策略重试，启用缓存时返回 CachedResponse（带 not_modified 标记）"""
+        get = functools.partial(self.retry_policy.call, self.transport.get)
+        if self.http_cache:
+            response = self.http_cache.fetch(get, url, headers=self.article_headers, timeout=self.config['timeout'])
+        else:
+            response = get(url, headers=self.article_headers, timeout=self.config['timeout'])
+            response.not_modified = False
+        
+        if not response.not_modified:
+            self.progress.add(bytes=len(response.content))
+        return response
+
     def process_articles(self, articles, keyword, save_dir):
-        """处理所有文章：提取内容、下载图片并保存到Word文档"""
-        if not articles or not self.is_crawling:
+        """
+        处理所有文章：提取内容、下载图片并保存到Word文档
+        articles 可以是列表，也可以是 iter_articles 这样的生成器（边获取列表边处理）
+        """
+        if not self.is_crawling:
             self.log("没有找到文章数据或爬取已停止", "WARNING")
             return []
         
-        total_articles = len(articles)
+        # 生成器无法预知长度，总数取列表接口返回的总条数
+        total_articles = len(articles) if hasattr(articles, '__len__') else None
         results = []
         
         # 创建保存目录
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
         
-        self.log(f"开始处理 {total_articles} 篇文章...")
-        
-        # 创建会话，提高请求效率
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Referer': 'https://so.eastmoney.com/',
-        })
+        if total_articles is not None:
+            self.log(f"开始处理 {total_articles} 篇文章...")
         
+        has_fetched = False
         try:
             for i, article in enumerate(articles):
                 if not self.is_crawling:
                     break
+                
+                total = max(total_articles or getattr(self, 'total_hits', 0), i + 1)
                     
                 # 确保文章数据包含必要的字段
                 if not isinstance(article, dict) or 'url' not in article or 'title' not in article:
@@ -496,21 +844,45 @@ class EastMoneyCrawler:
                 list_title = article['title']
                 
                 # 显示处理进度
-                if (i + 1) % 10 == 0 or (i + 1) == total_articles:
-                    self.log(f"进度: {i+1}/{total_articles} 篇 ({(i+1)/total_articles*100:.1f}%)")
+                if (i + 1) % 10 == 0 or (i + 1) == total:
+                    self.emit('progress', 'INFO', "进度: {done}/{total} 篇 ({percent:.1f}%)",
+                              done=i + 1, total=total, percent=(i + 1) / total * 100)
+                
+                # 增量模式：列表信息未变化且文档仍在，直接跳过
+                record = self.lookup_article(keyword, url, save_dir)
+                if record and record['list_hash'] == CrawlStore.hash_data(article):
+                    self.emit('article_skipped', 'INFO', "[{index}/{total}] 未变化，跳过: {title}",
+                              index=i + 1, total=total, title=list_title)
+                    results.append(self.skipped_result(i + 1, article, record))
+                    self.progress.add(articles_done=1)
+                    continue
+                
+                # 随机延迟，避免请求过于频繁
+                if has_fetched:
+                    delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
+                    self.emit('wait', 'DEBUG', "等待{delay:.1f}秒后处理下一篇文章...", delay=delay)
+                    self.cancel_token.wait(delay)
+                    if not self.is_crawling:
+                        break
+                has_fetched = True
                 
-                self.log(f"[{i+1}/{total_articles}] 处理文章: {list_title}")
+                self.emit('article_started', 'INFO', "[{index}/{total}] 处理文章: {title}",
+                          index=i + 1, total=total, title=list_title)
+                queued = False  # 文档已交给渲染阶段时，生成完成后再计入进度
                 
                 try:
-                    # 发送GET请求到文章URL，使用会话
-                    response = session.get(url, timeout=self.config['timeout'])
+                    # 发送GET请求到文章URL，复用共享连接，经过磁盘缓存
+                    response = self.fetch_article_page(url)
                     
-                    if response.status_code == 200:
-                        # 提取文章标题
-                        extracted_title = self.extract_article_title(response.text)
-                        
-                        # 提取正文内容和图片位置信息
-                        content_elements = self.extract_article_content_with_images(response.text)
+                    if response.not_modified and record and record['content_hash']:
+                        # 页面未变化（缓存有效或服务器返回304），无需重新解析
+                        self.log("页面未变化，沿用已有文档")
+                        result = self.skipped_result(i + 1, article, record)
+                        self.record_article(keyword, article, result, record['content_hash'])
+                    
+                    elif response.status_code == 200:
+                        # 解析一次页面，提取文章标题、正文内容和图片位置信息
+                        extracted_title, content_elements = self.extract_article(response.text)
                         
                         # 清理标题，使其适合用作文件名
                         cleaned_title = self.clean_filename(extracted_title) if extracted_title else self.clean_filename(list_title)
@@ -527,25 +899,36 @@ class EastMoneyCrawler:
                         }
                         
                         if extracted_title:
-                            self.log(f"提取的标题: {extracted_title}")
+                            self.emit('article_title', 'INFO', "提取的标题: {title}", title=extracted_title)
                         else:
                             self.log("未找到标题", "WARNING")
                         
                         if content_elements:
-                            # 统计文本和图片数量
-                            text_count = len([e for e in content_elements if e['type'] == 'text'])
-                            image_count = len([e for e in content_elements if e['type'] == 'image'])
+                            # 统计文本和图片数量，只在有订阅者接收时遍历正文
+                            if self.events.enabled('INFO'):
+                                text_count = sum(1 for e in content_elements if e['type'] == 'text')
+                                image_count = sum(1 for e in content_elements if e['type'] == 'image')
+                                self.emit('article_content', 'INFO', "找到 {texts} 段文本和 {images} 张图片",
+                                          texts=text_count, images=image_count)
                             
-                            self.log(f"找到 {text_count} 段文本和 {image_count} 张图片")
-                            
-                            # 保存到Word文档
-                            doc_path = self.save_to_doc_with_images(result, content_elements, save_dir)
-                            if doc_path:
-                                result['doc_path'] = doc_path
-                                self.log(f"已保存文档: {os.path.basename(doc_path)}")
+                            content_hash = CrawlStore.hash_data([extracted_title, content_elements])
+                            if record and record['content_hash'] == content_hash:
+                                # 正文未变化，沿用已有文档
+                                result['doc_path'] = record['doc_path']
+                                result['skipped'] = True
+                                self.emit('doc_reused', 'INFO', "正文未变化，沿用文档: {name}",
+                                          name=os.path.basename(record['doc_path']), path=record['doc_path'])
+                                self.record_article(keyword, article, result, content_hash)
                             else:
-                                self.log("保存文档失败", "WARNING")
-                                result['success'] = False
+                                # 保存到Word文档，已有文档时原地更新；文档在渲染进程中生成，
+                                # 生成完成后再写入增量索引，抓取线程继续处理下一篇
+                                def saved(doc_path, article=article, result=result, content_hash=content_hash):
+                                    self.doc_saved(keyword, article, result, content_hash, doc_path)
+                                    self.count_result(result)
+                                
+                                queued = True
+                                self.queue_doc(result, content_elements, save_dir, saved,
+                                               doc_path=record['doc_path'] if record else None)
                         else:
                             self.log("未找到正文内容", "WARNING")
                             result['success'] = False
@@ -607,16 +990,20 @@ class EastMoneyCrawler:
                     self.log(f"错误: {e}", "WARNING")
                 
                 results.append(result)
-                
-                # 随机延迟，避免请求过于频繁
-                if i < total_articles - 1 and self.is_crawling:
-                    delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-                    self.log(f"等待{delay:.1f}秒后处理下一篇文章...")
-                    time.sleep(delay)
+                if not queued:
+                    self.count_result(result)
         
         finally:
-            # 确保会话关闭
-            session.close()
+            # 提前停止时关闭文章生成器，释放后台预取线程
+            if hasattr(articles, 'close'):
+                articles.close()
+            
+            # 等待已提交的文档生成完毕，结果汇总前每篇文章的状态都已确定
+            if self.renderer:
+                self.renderer.drain()
+        
+        if not results and self.is_crawling:
+            self.log("没有找到文章数据", "WARNING")
         
         return results
 
@@ -624,21 +1011,18 @@ class EastMoneyCrawler:
         """爬取指定关键词的文章"""
         try:
             self.is_crawling = True
+            self.progress.reset()
             self.log(f"开始爬取东方财富，关键词: {keyword}")
+            self.open_store(save_dir)
+            self.open_renderer()
             
-            # 1. 获取所有页面的文章列表
-            self.log("正在获取所有文章列表...")
-            all_articles = self.get_all_articles(keyword)
+            # 1. 逐页获取文章列表，2. 同时处理已获取的文章：提取内容、下载图片并保存到Word文档
+            self.log("正在获取文章列表，获取到的文章将立即处理...")
+            results = self.process_articles(self.iter_articles(keyword), keyword, save_dir)
             
-            if all_articles:
-                self.log(f"成功获取 {len(all_articles)} 篇文章")
-                
-                # 2. 处理所有文章：提取内容、下载图片并保存到Word文档
-                results = self.process_articles(all_articles, keyword, save_dir)
-                
+            if results:
                 # 3. 打印处理结果汇总
                 self.print_processing_summary(results, keyword)
-                
                 return results
             else:
                 self.log("获取文章列表失败", "WARNING")
@@ -647,6 +1031,382 @@ class EastMoneyCrawler:
         except Exception as e:
             self.log(f"爬取过程中发生错误: {str(e)}", "ERROR")
             return []
+        
+        finally:
+            self.close_renderer()
+            self.close_store()
+
+    # ---------------- 异步引擎 ----------------
+
+    async def async_get_articles_list(self, session, semaphore, keyword, page_index=1, page_size=10):
+        """get_articles_list 的异步版本，失败时按重试策略重试"""
+        if not self.is_crawling:
+            return None
+        
+        url, params, headers = self.build_list_request(keyword, page_index, page_size)
+        
+        async def send(url, **kwargs):
+            await self.rate_limiter.acquire_async(url)
+            async with semaphore:
+                return await session.get(url, **kwargs)
+        
+        waits = 0
+        while True:
+            try:
+                response = await self.retry_policy.call_async(send, url, params=params, headers=headers,
+                                                              timeout=self.config['timeout'])
+                
+                self.emit('page_fetched', 'DEBUG', "第{page}页请求状态码: {status}", page=page_index, status=response.status_code)
+                return self.parse_list_response(response.text)
+            except CircuitOpenError as e:
+                delay = self.breaker_retry_delay(page_index, e, waits)
+                if delay is None:
+                    return None
+                # 停止时由 async_watch_stop 取消任务，等待随之中断
+                await asyncio.sleep(delay)
+                waits += 1
+            except Exception as e:
+                self.log(f"请求文章列表失败，放弃请求: {e}", "ERROR")
+                return None
+
+    async def async_produce_articles(self, session, semaphore, keyword, queue):
+        """
+        iter_articles 的异步版本：第一页确定总页数后，其余页面在滑动窗口内并发获取，
+        按页码顺序把 (序号, 文章) 放入有界队列，队列满时暂停获取，从而限制内存占用。
+        """
+        self.total_hits = 0
+        self.log(f"正在搜索关键词: {keyword}")
+        first_page_data = None
+        for page_size in self.config['page_size_candidates']:
+            if not self.is_crawling:
+                break
+            
+            page_data = await self.async_get_articles_list(session, semaphore, keyword, 1, page_size)
+            if self.check_page_size(page_size, page_data):
+                self.log(f"使用每页 {page_size} 条")
+                first_page_data = page_data
+                break
+            
+            self.log(f"接口不接受每页 {page_size} 条，尝试更小的值", "WARNING")
+        
+        if not first_page_data:
+            self.log("获取第一页数据失败", "ERROR")
+            return
+        
+        total_count = first_page_data.get('hitsTotal', 0)
+        self.total_hits = total_count
+        self.log(f"找到 {total_count} 条相关文章")
+        
+        if total_count == 0:
+            self.log("没有找到相关文章", "WARNING")
+            return
+        
+        total_pages = math.ceil(total_count / page_size)
+        self.log(f"总共 {total_pages} 页")
+        self.progress.set(pages_total=total_pages, articles_total=total_count)
+        
+        window = max(1, self.config['list_workers']) * 2
+        pages = iter(range(2, total_pages + 1))
+        pending = []  # 按页码顺序排列的 (page, task)
+        failed_pages = []
+        index = 0
+        
+        async def enqueue(page, page_data):
+            nonlocal index
+            self.progress.add(pages_listed=1)
+            if page_data and 'result' in page_data and 'article' in page_data['result']:
+                articles = page_data['result']['article']
+                self.emit('page_listed', 'INFO', "第{page}页: 获取到 {count} 篇文章", page=page, count=len(articles))
+                for article in articles:
+                    index += 1
+                    await queue.put((index, article))
+            elif self.is_crawling:
+                self.log(f"第{page}页获取失败", "WARNING")
+                failed_pages.append(page)
+        
+        try:
+            await enqueue(1, first_page_data)
+            while self.is_crawling:
+                # 补满在途窗口
+                while len(pending) < window:
+                    page = next(pages, None)
+                    if page is None:
+                        break
+                    task = asyncio.ensure_future(self.async_get_articles_list(session, semaphore, keyword, page, page_size))
+                    pending.append((page, task))
+                
+                if not pending:
+                    break
+                
+                page, task = pending.pop(0)
+                await enqueue(page, await task)
+        finally:
+            for _, task in pending:
+                task.cancel()
+        
+        self.log(f"总共获取到 {index} 篇文章")
+        self.report_failed_pages(failed_pages)
+
+    def async_fetch_func(self, session, semaphore):
+        """异步引擎的文章/图片请求函数：按主机限速并占用一个在途请求名额，每次重试同样受限"""
+        async def fetch(url, **kwargs):
+            await self.fetch_rate_limiter.acquire_async(url)
+            async with semaphore:
+                return await session.get(url, **kwargs)
+        return fetch
+
+    async def async_download_image(self, session, semaphore, img_url):
+        """download_image_to_memory 的异步版本"""
+        if not self.is_crawling:
+            return None
+        
+        if self.image_store:
+            img_data = self.image_store.get(img_url)
+            if img_data is not None:
+                self.progress.add(images=1)
+                return img_data
+        
+        try:
+            response = await self.retry_policy.call_async(self.async_fetch_func(session, semaphore), img_url,
+                                                          headers=self.image_headers, timeout=self.config['timeout'])
+            
+            if response.status_code == 200:
+                if self.image_store:
+                    self.image_store.put(img_url, response.content)
+                self.progress.add(images=1, bytes=len(response.content))
+                self.emit('image_done', 'DEBUG', "图片已下载: {url} ({size} 字节)", url=img_url, size=len(response.content))
+                return response.content
+            self.log(f"下载图片失败: {img_url} (状态码: {response.status_code})", "WARNING")
+            return None
+        except Exception as e:
+            self.log(f"下载图片失败，放弃下载: {img_url} ({e})", "WARNING")
+            return None
+
+    async def async_process_article(self, session, semaphore, index, total_articles, article, keyword, save_dir):
+        """异步处理单篇文章：获取页面、提取内容、并发下载图片并保存到Word文档"""
+        url = article['url']
+        list_title = article['title']
+        
+        # 增量模式：列表信息未变化且文档仍在，直接跳过
+        record = self.lookup_article(keyword, url, save_dir)
+        if record and record['list_hash'] == CrawlStore.hash_data(article):
+            self.emit('article_skipped', 'INFO', "[{index}/{total}] 未变化，跳过: {title}",
+                      index=index, total=total_articles, title=list_title)
+            return self.skipped_result(index, article, record)
+        
+        result = {
+            'index': index,
+            'list_title': list_title,
+            'extracted_title': None,
+            'cleaned_title': None,
+            'url': url,
+            'content_elements': [],
+            'status_code': None,
+            'success': False
+        }
+        
+        self.emit('article_started', 'INFO', "[{index}/{total}] 处理文章: {title}",
+                  index=index, total=total_articles, title=list_title)
+        
+        try:
+            get = functools.partial(self.retry_policy.call_async, self.async_fetch_func(session, semaphore))
+            if self.http_cache:
+                response = await self.http_cache.fetch_async(get, url, headers=self.article_headers,
+                                                             timeout=self.config['timeout'])
+            else:
+                response = await get(url, headers=self.article_headers, timeout=self.config['timeout'])
+        except Exception as e:
+            result['error'] = str(e)
+            self.log(f"错误: {e}", "WARNING")
+            return result
+        
+        if not getattr(response, 'not_modified', False):
+            self.progress.add(bytes=len(response.content))
+        
+        if getattr(response, 'not_modified', False) and record and record['content_hash']:
+            # 页面未变化（缓存有效或服务器返回304），无需重新解析
+            self.log("页面未变化，沿用已有文档")
+            result = self.skipped_result(index, article, record)
+            self.record_article(keyword, article, result, record['content_hash'])
+            return result
+        
+        result['status_code'] = response.status_code
+        if response.status_code != 200:
+            result['error'] = f'HTTP错误: {response.status_code}'
+            self.log(f"HTTP错误: {response.status_code}", "WARNING")
+            return result
+        
+        # 解析在线程中进行，避免阻塞事件循环
+        extracted_title, content_elements = await asyncio.to_thread(self.extract_article, response.text)
+        
+        result.update({
+            'extracted_title': extracted_title,
+            'cleaned_title': self.clean_filename(extracted_title or list_title),
+            'content_elements': content_elements,
+            'success': True
+        })
+        
+        if not content_elements:
+            self.log("未找到正文内容", "WARNING")
+            result['success'] = False
+            return result
+        
+        content_hash = CrawlStore.hash_data([extracted_title, content_elements])
+        if record and record['content_hash'] == content_hash:
+            # 正文未变化，沿用已有文档
+            result['doc_path'] = record['doc_path']
+            result['skipped'] = True
+            self.emit('doc_reused', 'INFO', "正文未变化，沿用文档: {name}",
+                      name=os.path.basename(record['doc_path']), path=record['doc_path'])
+            self.record_article(keyword, article, result, content_hash)
+            return result
+        
+        # 并发下载本文的所有图片
+        image_urls = list(dict.fromkeys(e['src'] for e in content_elements if e['type'] == 'image'))
+        image_data = await asyncio.gather(*[
+            self.async_download_image(session, semaphore, img_url) for img_url in image_urls
+        ])
+        images = dict(zip(image_urls, image_data))
+        
+        if not self.is_crawling:
+            result['success'] = False
+            return result
+        
+        # 生成文档属于CPU密集操作，交给渲染进程
+        doc_path = await self.async_save_doc(result, content_elements, save_dir, images,
+                                             record['doc_path'] if record else None)
+        self.doc_saved(keyword, article, result, content_hash, doc_path)
+        return result
+
+    async def async_save_doc(self, article_info, content_elements, doc_save_dir, images, doc_path=None):
+        """save_to_doc_with_images 的异步版本：文档在渲染进程中生成，等待期间不阻塞事件循环"""
+        if self.renderer is None:
+            return await asyncio.to_thread(self.save_to_doc_with_images, article_info, content_elements,
+                                           doc_save_dir, images, doc_path)
+        
+        render_args = future = None
+        try:
+            render_args = self.prepare_doc(article_info, content_elements, doc_save_dir, images, doc_path)
+            if render_args is None:
+                return None
+            # 在途渲染任务已满时 submit 会阻塞，放到线程中等待
+            future = await asyncio.to_thread(self.renderer.submit, render_article_doc, *render_args)
+            self.log_messages(await asyncio.wrap_future(future))
+            return render_args[0]
+        except asyncio.CancelledError:
+            # 停止爬取时新文档不会写入增量索引，渲染完成后删除，下次运行重新生成
+            if render_args and not doc_path:
+                if future is not None:
+                    future.add_done_callback(lambda _: release_doc_path(render_args[0]))
+                else:
+                    release_doc_path(render_args[0])
+            raise
+        except Exception as e:
+            self.log(f"保存文档时出错: {e}", "ERROR")
+            if render_args and not doc_path:
+                release_doc_path(render_args[0])
+            return None
+
+    async def async_process_articles(self, session, semaphore, keyword, save_dir, results):
+        """
+        列表获取与文章处理同时进行：一个生产者协程逐页放入文章，
+        async_workers 个协程从队列取出并处理，结果追加到 results
+        """
+        if not os.path.exists(save_dir):
+            os.makedirs(save_dir)
+        
+        workers = max(1, self.config['async_workers'])
+        queue = asyncio.Queue(maxsize=workers * 4)
+        
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None or not self.is_crawling:
+                    return
+                
+                i, article = item
+                if not isinstance(article, dict) or 'url' not in article or 'title' not in article:
+                    self.log(f"跳过无效文章数据: {article}", "WARNING")
+                    continue
+                
+                total = max(self.total_hits, i)
+                results.append(await self.async_process_article(session, semaphore, i, total, article, keyword, save_dir))
+                self.count_result(results[-1])
+                
+                done = len(results)
+                if done % 10 == 0 or done == total:
+                    self.emit('progress', 'INFO', "进度: {done}/{total} 篇 ({percent:.1f}%)",
+                              done=done, total=total, percent=done / total * 100)
+        
+        async def producer():
+            await self.async_produce_articles(session, semaphore, keyword, queue)
+            # 每个消费者一个结束标记；生产者出错时由下方统一取消消费者，
+            # 不在队列已满且无人消费时阻塞
+            for _ in range(workers):
+                await queue.put(None)
+        
+        tasks = [asyncio.ensure_future(producer())] + [asyncio.ensure_future(worker()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # 任一协程出错（或整体被取消）时取消其余协程并等待其结束，
+            # 调用方随后关闭会话、增量索引和渲染阶段时不再有协程使用它们
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def async_watch_stop(self, task):
+        """等待取消令牌，取消后取消爬取任务，在途请求和等待随之中断"""
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        remove = self.cancel_token.on_cancel(lambda: loop.call_soon_threadsafe(stopped.set))
+        try:
+            await stopped.wait()
+            task.cancel()
+        finally:
+            remove()
+
+    async def crawl_keyword_async(self, keyword, save_dir):
+        """
+        异步爬取指定关键词的文章，流程与 crawl_keyword 相同：
+        基于 curl_cffi AsyncSession，列表、文章和图片请求并发进行，
+        在途请求数不超过 async_concurrency。
+        """
+        results = []
+        try:
+            self.is_crawling = True
+            self.progress.reset()
+            self.log(f"开始爬取东方财富(异步)，关键词: {keyword}")
+            self.open_store(save_dir)
+            self.open_renderer()
+            
+            async with AsyncSession(impersonate="chrome", max_clients=self.config['async_concurrency']) as session:
+                semaphore = asyncio.Semaphore(self.config['async_concurrency'])
+                
+                self.log("正在获取文章列表，获取到的文章将立即处理...")
+                crawl_task = asyncio.ensure_future(self.async_process_articles(session, semaphore, keyword, save_dir, results))
+                watcher = asyncio.ensure_future(self.async_watch_stop(crawl_task))
+                try:
+                    await crawl_task
+                except asyncio.CancelledError:
+                    self.log(f"爬取已停止: 已处理 {len(results)} 篇文章", "WARNING")
+                finally:
+                    watcher.cancel()
+            
+            if results:
+                results.sort(key=lambda r: r['index'])
+                self.print_processing_summary(results, keyword)
+            else:
+                self.log("获取文章列表失败", "WARNING")
+            return results
+        
+        except Exception as e:
+            self.log(f"爬取过程中发生错误: {str(e)}", "ERROR")
+            return results
+        
+        finally:
+            await asyncio.to_thread(self.close_renderer)
+            self.close_store()
 
     def print_processing_summary(self, results, keyword):
         """打印处理结果汇总"""
@@ -658,12 +1418,15 @@ class EastMoneyCrawler:
         failed_count = len(results) - success_count
         content_found = len([r for r in results if r.get('content_elements')])
         docs_saved = len([r for r in results if r.get('doc_path')])
+        skipped_count = len([r for r in results if r.get('skipped')])
         
         self.log(f"总文章数: {len(results)}")
         self.log(f"请求成功: {success_count}")
         self.log(f"请求失败: {failed_count}")
         self.log(f"找到正文内容: {content_found}")
         self.log(f"成功保存文档: {docs_saved}")
+        if skipped_count:
+            self.log(f"未变化跳过: {skipped_count}")
         
         # 显示成功保存的文档
         saved_docs = [r for r in results if r.get('doc_path')]
@@ -679,12 +1442,23 @@ class EastMoneyCrawler:
             for failed in failed_requests:
                 self.log(f"  ✗ {failed.get('list_title', '未知标题')}")
                 self.log(f"     错误: {failed.get('error', '未知错误')}")
+        
+        self.log_connection_stats()
+
+    def log_connection_stats(self):
+        """显示共享连接池的复用情况"""
+        connection_stats = self.transport.connection_stats()
+        if connection_stats:
+            self.log("连接复用统计:")
+            for host, stats in connection_stats.items():
+                self.log(f"  {host}: 请求 {stats['requests']} 次, 新建连接 {stats['new_connections']} 个, 复用 {stats['reused']} 次")
 
 # 保留原有的main函数用于独立运行
 def main():
     import sys
-    if len(sys.argv) > 1:
-        keyword = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args:
+        keyword = args[0]
     else:
         keyword = input("请输入搜索关键词: ").strip()
     
@@ -693,7 +1467,14 @@ def main():
         return
     
     crawler = EastMoneyCrawler()
-    results = crawler.crawl_keyword(keyword, f"articles_{crawler.clean_filename(keyword)}")
+    save_dir = f"articles_{crawler.clean_filename(keyword)}"
+    try:
+        if '--async' in sys.argv:
+            results = asyncio.run(crawler.crawl_keyword_async(keyword, save_dir))
+        else:
+            results = crawler.crawl_keyword(keyword, save_dir)
+    finally:
+        crawler.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
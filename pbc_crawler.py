@@ -1,38 +1,144 @@
 import requests
 from urllib.parse import urlencode
-import time
+import itertools
 import random
-from bs4 import BeautifulSoup
-from docx import Document
-from docx.shared import Inches
+from bs4 import BeautifulSoup, Tag
 import os
 from urllib.parse import urljoin
 import re
+import csv
+import functools
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from doc_render import DocRenderer, render_text_doc, DEFAULT_RENDER_WORKERS
+from crawler_utils import (HttpCache, ImageStore, AttachmentStore, HostRateLimiter, RetryPolicy, UrlFrontier,
+                           CancelToken, CircuitOpenError, EventBus, CrawlProgress, cancellable_session, reserve_doc_path, release_doc_path,
+                           DEFAULT_HTML_PARSER)
 
 class PBCCrawler:
-    def __init__(self, log_callback=None):
+    def __init__(self, log_callback=None, cancel_token=None, log_level='INFO'):
+        """
+        cancel_token 为与界面共享的取消令牌，不指定时自己创建
+        log_callback(消息, 级别) 作为事件订阅者接收不低于 log_level 的事件，
+        其他消费者（如日志文件）可以通过 self.events.subscribe 订阅
+        """
         self.log_callback = log_callback if log_callback else print
-        self.is_crawling = True
+        self.events = EventBus()
+        self.events.subscribe(lambda event: self.log_callback(event.message, event.level), log_level)
+        # emit(类型, 级别, 模板, **字段) 发出结构化事件，消息在订阅者读取时才格式化，
+        # 没有订阅者接收该级别时直接返回；循环中的频繁日志使用它，直接绑定以省去一层调用
+        self.emit = self.events.emit
+        self.progress = CrawlProgress()  # 进度计数，界面定时读取
+        self._owns_cancel_token = cancel_token is None
+        self.cancel_token = cancel_token if cancel_token else CancelToken()
+        self.renderer = None  # 文档渲染阶段，在 crawl_and_process_pages 中启动
         
         # 配置
         self.config = {
             'min_delay': 2,
             'max_delay': 4,
             'max_retries': 3,
+            'retry_base_delay': 2.0,  # 重试退避的初始等待(秒)，每次重试翻倍
+            'retry_max_delay': 60.0,  # 重试退避的最长等待(秒)
+            'breaker_threshold': 5,  # 同一主机连续失败多少次后暂停请求
+            'breaker_cooldown': 120.0,  # 主机暂停请求的时长(秒)
             'timeout': 30,
-            'max_pages': 10000000  # 限制最大页数
+            'html_parser': DEFAULT_HTML_PARSER,  # BeautifulSoup解析器：lxml 或 html.parser
+            'max_pages': 10000000,  # 限制最大页数
+            'newest_first': False,  # 增量模式：按日期从新到旧翻页，遇到整页都是已记录的链接或早于截止日期时停止
+            'newest_sort': 'dateTime desc',  # 按日期排序时搜索接口的 sr 参数
+            'date_cutoff': None,  # 截止日期(YYYY-MM-DD)，按日期翻页时早于该日期的结果不再获取
+            'frontier_name': 'pbc_frontier.db',  # 链接待办队列文件名，保存在结果目录下
+            'frontier_capacity': 1000000,  # 待办队列布隆过滤器的预期链接数
+            'frontier_max_attempts': 3,  # 同一链接最多失败几次，达到后不再重试（中途停止不计）
+            'keyword_index_name': 'keyword_index.csv',  # 批量爬取时每篇文章匹配关键词的索引文件名
+            'page_workers': 3,  # 并发获取搜索结果页的线程数
+            'list_breaker_waits': 3,  # 搜索页所在主机熔断时最多等待几次冷却后重试，仍熔断则放弃该页
+            'attachment_workers': 3,  # 每篇文章并发下载附件的线程数
+            'attachment_max_mb': 200,  # 单个附件大小上限(MB)，超过则放弃下载
+            'attachment_chunk_kb': 256,  # 附件流式写盘的块大小(KB)
+            'render_workers': DEFAULT_RENDER_WORKERS,  # 生成Word文档的进程数，0 表示在抓取线程中生成
+            'render_queue_size': 16,  # 等待生成的文档数上限，达到后抓取暂停
+            'page_min_interval': 0.5,  # 同一主机搜索请求的最小间隔(秒)
+            'page_max_interval': 1.0,  # 同一主机搜索请求的最大间隔(秒)
+            'http_cache_dir': os.path.join('cache', 'http'),  # 文章页面磁盘缓存目录，为空时不缓存
+            'http_cache_ttl': 24 * 3600,  # 缓存有效期(秒)，过期后向服务器重新验证
+            'http_cache_max_mb': 500,  # 缓存总大小上限(MB)
+            'image_cache_dir': os.path.join('cache', 'images'),  # 图片缓存目录（与东方财富爬虫共用），为空时不缓存
+            'image_cache_max_mb': 1024,  # 图片缓存总大小上限(MB)
+            'attachment_cache_dir': os.path.join('cache', 'attachments'),  # 附件存储目录，跨文章、跨运行去重，为空时不去重
+            'attachment_cache_max_mb': 4096  # 附件存储总大小上限(MB)
         }
+        
+        # 按主机共享的限速器，取代翻页前的固定等待
+        self.rate_limiter = HostRateLimiter(self.config['page_min_interval'], self.config['page_max_interval'],
+                                            sleep_func=self.cancel_token.sleep)
+        
+        # 搜索、文章、图片和附件请求共用的连接池，取消时在途连接直接关闭
+        self.session = cancellable_session(self.cancel_token, pool_maxsize=max(self.config['page_workers'], self.config['attachment_workers']) * 2)
+        
+        # 搜索、文章、图片和附件请求共用的重试策略和按主机熔断
+        self.retry_policy = RetryPolicy(
+            max_retries=self.config['max_retries'],
+            base_delay=self.config['retry_base_delay'],
+            max_delay=self.config['retry_max_delay'],
+            breaker_threshold=self.config['breaker_threshold'],
+            breaker_cooldown=self.config['breaker_cooldown'],
+            sleep_func=self.cancel_token.sleep,
+            log_callback=lambda message, level="INFO": self.events.emit('retry', level, message)
+        )
+        
+        # 文章页面磁盘缓存
+        self.http_cache = None
+        if self.config['http_cache_dir']:
+            self.http_cache = HttpCache(self.config['http_cache_dir'], self.config['http_cache_ttl'],
+                                        self.config['http_cache_max_mb'] * 1024 * 1024)
+        
+        # 跨文章、跨运行共享的图片缓存
+        self.image_store = None
+        if self.config['image_cache_dir']:
+            self.image_store = ImageStore(self.config['image_cache_dir'], self.config['image_cache_max_mb'] * 1024 * 1024)
+        
+        # 跨文章、跨运行共享的附件存储，结果目录中的附件是指向它的硬链接
+        self.attachment_store = None
+        if self.config['attachment_cache_dir']:
+            self.attachment_store = AttachmentStore(self.config['attachment_cache_dir'],
+                                                    self.config['attachment_cache_max_mb'] * 1024 * 1024)
     
+    @property
+    def is_crawling(self):
+        """爬取状态由取消令牌决定：令牌取消后等待立即结束，在途请求随即中断"""
+        return not self.cancel_token.cancelled
+
+    @is_crawling.setter
+    def is_crawling(self, value):
+        if not value:
+            self.cancel_token.cancel()
+        elif self._owns_cancel_token:
+            # 外部传入的令牌由调用方决定是否取消，不在这里恢复
+            self.cancel_token.reset()
+
     def log(self, message, level="INFO"):
-        """日志记录"""
-        self.log_callback(f"{message}", level)
+        """日志记录：发出已格式化好的普通日志事件"""
+        self.events.emit('log', level, str(message))
     
+    def close(self):
+        """释放连接池和图片、附件存储的数据库连接，爬虫不再使用后调用"""
+        self.session.close()
+        if self.image_store:
+            self.image_store.close()
+            self.image_store = None
+        if self.attachment_store:
+            self.attachment_store.close()
+            self.attachment_store = None
+
     def stop_crawling(self):
         """停止爬取"""
         self.is_crawling = False
         self.log("收到停止信号", "WARNING")
     
-    def crawl_pbc_search(self, page=1, keyword="金融监管", retry_count=0):
+    def crawl_pbc_search(self, page=1, keyword="金融监管"):
         """
         爬取中国人民银行网站搜索结果的函数
         """
@@ -50,7 +156,7 @@ class PBCCrawler:
             "originalSearch": "",
             "app": "9fc3239692e448f894e3bd8d674b55b8,fea427d898234869be673fce4767b655,c103cb417c3e4ca79b7660f11e19cc8a,8d97b205b3844c58a6fad8f846106c39,d774a7e1668d4c7ebbb2ec96519ab466,07ea3d4cf62a4953aacbed6ff295c37a,f4c26e783ca448fe815ee3353fc9ab54,da38e4920e16490d91643876517fc623,a02114069e134838847c9e23090d8a41,1b78b68b865c4da58372d1a9f04b9782,4063d07b489d4a9a874170f97fb7600c,f5390b519b7144bea54dbb7078f3545f,910172d1ac5a4a1f8122291df54b1cf2,71a08f51290d488782be1575a4c56b05,14fc626387524a019fb092604b88d2db,d445ce2a46144608831a7beff59010f0,bba920ef834447c78f3e235429db9375,73094b4d50c14db984741455360531c0,2487d9db44e24c98bf0ca496a8ccc525,3c6575ffd059462c982b187810a2ab42,c9831f1dad3a4fd5a7e7ee1b152b0744,2167d3331f4045098ebdffddb9f04cab,e1ea1c866c82452a95b1b2a8547733a6,21424b94fd544684891bb477f813fe38,a576e41580e942ecb77736150058f2f3,13f3bfaf44a3438bb555c8a740995c4e,161f5d5b817d409bb5cbd4c5aebe48b0,079971477b754c5eb91a05087e244623,43da8aa849cc41d5a098c458dd4741d9,b1463b021ebe4531b57712e876f9d7fc,de28fe0e9b4a4ffc93958fe74072cb08,f29e12211177456a9ed0657e6e5c19c3,64ffe8bb793c445bb07a9036326a69eb,bcaf7d31fe164a2ea6d75fff601a008e,b9e0c76b7bf24d0da12ab4755893184c,9641e32d9d2c4410a397dd85463f6923,d74612e724a342a5b4cc8d4793342d48,7a5471bbd80a4a0cbbebd02555714f2a,88c9d6458fcd4d9baf16cfc1f0782532,2d342bb6f743463d88be3c85c1e9fae2,506771dc122b4d80aaa3ef93bec39e61,50436d23f0954c48932b50687f271984,847a6664a5424143949f9dbbda5c0b9d",
             "appName": "",
-            "sr": "score desc",
+            "sr": self.config['newest_sort'] if self.config['newest_first'] else "score desc",
             "advtime": "",
             "advrange": "",
             "ext": "-siteId:3688005",
@@ -77,35 +183,78 @@ class PBCCrawler:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0"
         }
         
-        try:
-            response = requests.post(
-                url=url,
-                params=params,
-                data=data,
-                headers=headers,
-                timeout=self.config['timeout']
-            )
-            
-            if response.status_code == 200:
-                self.log(f"第{page}页爬取成功！")
-                return response.text
-            else:
-                self.log(f"请求失败，状态码：{response.status_code}", "WARNING")
-                return None
+        def send(url, **kwargs):
+            # 按主机限速，每次重试同样受限
+            self.rate_limiter.acquire(url)
+            return self.session.post(url, **kwargs)
+        
+        waits = 0
+        while True:
+            try:
+                response = self.retry_policy.call(
+                    send,
+                    url,
+                    params=params,
+                    data=data,
+                    headers=headers,
+                    timeout=self.config['timeout']
+                )
                 
-        except requests.exceptions.RequestException as e:
-            self.log(f"请求发生错误：{e}", "WARNING")
-            
-            # 重试机制
-            if retry_count < self.config['max_retries']:
-                retry_delay = random.uniform(2, 5)
-                self.log(f"第{retry_count+1}次重试，等待{retry_delay:.1f}秒...")
-                time.sleep(retry_delay)
-                return self.crawl_pbc_search(page, keyword, retry_count+1)
-            else:
-                self.log(f"已达到最大重试次数({self.config['max_retries']})，放弃请求", "ERROR")
+                if response.status_code == 200:
+                    self.emit('page_fetched', 'DEBUG', "第{page}页爬取成功！", page=page)
+                    return response.text
+                else:
+                    self.log(f"请求失败，状态码：{response.status_code}", "WARNING")
+                    return None
+                    
+            except CircuitOpenError as e:
+                # 搜索页丢失意味着整页链接漏爬：等熔断冷却结束后重试该页，多次仍熔断才放弃
+                if waits >= self.config['list_breaker_waits']:
+                    self.log(f"第{page}页所在主机持续熔断，放弃请求：{e}", "ERROR")
+                    return None
+                self.log(f"第{page}页所在主机熔断中，{e.retry_after:.0f}秒后重试该页", "WARNING")
+                if self.cancel_token.wait(e.retry_after):
+                    return None
+                waits += 1
+            except requests.exceptions.RequestException as e:
+                self.log(f"请求发生错误，放弃请求：{e}", "ERROR")
                 return None
 
+    def fetch_pages_concurrently(self, keyword, pages):
+        """
+        并发获取多个搜索结果页，同时在途的请求数不超过 page_workers，
+        请求频率由共享的按主机限速器控制。按页码顺序产出 (page, html)，
+        单页失败时 html 为 None，不影响其他页。
+        """
+        workers = max(1, self.config['page_workers'])
+        window = workers * 2  # 预提交的页数，保证线程池始终有活可干
+        pages = iter(pages)
+        pending = []  # 按页码顺序排列的 (page, future)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pbc-search") as executor:
+            try:
+                while True:
+                    # 补满在途窗口
+                    while self.is_crawling and len(pending) < window:
+                        page = next(pages, None)
+                        if page is None:
+                            break
+                        pending.append((page, executor.submit(self.crawl_pbc_search, page, keyword)))
+                    
+                    if not pending:
+                        break
+                    
+                    page, future = pending.pop(0)
+                    try:
+                        content = future.result()
+                    except Exception as e:
+                        self.log(f"第{page}页请求异常: {e}", "WARNING")
+                        content = None
+                    yield page, content
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
     def get_total_pages(self, html_content):
         """
         从搜索结果页面获取总页数
@@ -113,7 +262,7 @@ class PBCCrawler:
         if not html_content:
             return 1
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = self.parse_document(html_content)
         
         # 查找包含总页数的元素
         total_records_span = soup.find('span', class_='default-result-tolal-records')
@@ -140,7 +289,7 @@ class PBCCrawler:
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = self.parse_document(html_content)
         
         result_list_div = soup.find('div', class_='default-result-list conMid_con')
         
@@ -161,17 +310,41 @@ class PBCCrawler:
                 
                 link_data.append({
                     'title': title,
-                    'link': href
+                    'link': href,
+                    'date': self.extract_result_date(a_tag)
                 })
         
         return link_data
 
+    def extract_result_date(self, a_tag):
+        """
+        从搜索结果条目中提取发布日期，返回 YYYY-MM-DD，找不到时返回None
+        条目为链接所在的 li/tr/dd 元素，没有时取链接的父元素
+        """
+        item = a_tag.find_parent(['li', 'tr', 'dd']) or a_tag.parent
+        if item is None:
+            return None
+        match = re.search(r'(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})', item.get_text(' ', strip=True))
+        if not match:
+            return None
+        year, month, day = match.groups()
+        return f"{year}-{int(month):02d}-{int(day):02d}"
+
+    def parse_document(self, html_content):
+        """
+        解析页面为DOM；已经是解析结果时原样返回。
+        同一页面的标题、正文、图片和附件提取共用这一次解析的结果。
+        """
+        if isinstance(html_content, Tag):
+            return html_content
+        return BeautifulSoup(html_content, self.config['html_parser'])
+
     def extract_title(self, html_content):
         """
-        从HTML中提取标题
+        从HTML（或已解析的DOM）中提取标题
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = self.parse_document(html_content)
             
             # 多种选择器尝试
             selectors = [
@@ -198,71 +371,67 @@ class PBCCrawler:
             self.log(f"提取标题时出错: {e}", "WARNING")
             return "未知标题"
 
+    def extract_content_node(self, html_content):
+        """
+        从HTML（或已解析的DOM）中定位正文节点
+        优先提取id="UCAP-CONTENT"的div，如果没有则提取id="zoom"的div，
+        再尝试常见的内容选择器，最后退回到body，都没有时返回None
+        """
+        soup = self.parse_document(html_content)
+        
+        # 首先尝试提取id="UCAP-CONTENT"的div
+        ucap_content_div = soup.find('div', id='UCAP-CONTENT')
+        if ucap_content_div:
+            self.log("使用id='UCAP-CONTENT'的内容")
+            return ucap_content_div
+        
+        # 如果没有id="UCAP-CONTENT"，则尝试提取id="zoom"的div
+        zoom_div = soup.find('div', id='zoom')
+        if zoom_div:
+            self.log("使用id='zoom'的内容")
+            return zoom_div
+        
+        # 尝试其他常见的内容选择器
+        content_selectors = [
+            '.content',
+            '.article-content',
+            '.main-content',
+            '.text-content',
+            'div[class*="content"]',
+            'div[class*="article"]'
+        ]
+        
+        for selector in content_selectors:
+            content_div = soup.select_one(selector)
+            if content_div:
+                self.log(f"使用选择器找到内容: {selector}")
+                return content_div
+        
+        # 如果两者都没有找到
+        self.log("未找到特定内容区域，将使用body内容", "WARNING")
+        return soup.find('body')
+
     def extract_content(self, html_content):
         """
-        从HTML内容中提取正文内容
-        优先提取id="UCAP-CONTENT"的div，如果没有则提取id="zoom"的div
+        从HTML内容中提取正文内容，返回 {'html': 正文HTML, 'text': 正文文本}
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 首先尝试提取id="UCAP-CONTENT"的div
-            ucap_content_div = soup.find('div', id='UCAP-CONTENT')
-            
-            if ucap_content_div:
-                self.log("使用id='UCAP-CONTENT'的内容")
-                return {
-                    'html': ucap_content_div.prettify(),
-                    'text': ucap_content_div.get_text(separator='\n', strip=True)
-                }
-            
-            # 如果没有id="UCAP-CONTENT"，则尝试提取id="zoom"的div
-            zoom_div = soup.find('div', id='zoom')
-            
-            if zoom_div:
-                self.log("使用id='zoom'的内容")
-                return {
-                    'html': zoom_div.prettify(),
-                    'text': zoom_div.get_text(separator='\n', strip=True)
-                }
-            
-            # 尝试其他常见的内容选择器
-            content_selectors = [
-                '.content',
-                '.article-content',
-                '.main-content',
-                '.text-content',
-                'div[class*="content"]',
-                'div[class*="article"]'
-            ]
-            
-            for selector in content_selectors:
-                content_div = soup.select_one(selector)
-                if content_div:
-                    self.log(f"使用选择器找到内容: {selector}")
-                    return {
-                        'html': content_div.prettify(),
-                        'text': content_div.get_text(separator='\n', strip=True)
-                    }
-            
-            # 如果两者都没有找到
-            self.log("未找到特定内容区域，将使用body内容", "WARNING")
-            body_content = soup.find('body')
-            if body_content:
+            content_node = self.extract_content_node(html_content)
+            if content_node:
                 return {
-                    'html': body_content.prettify(),
-                    'text': body_content.get_text(separator='\n', strip=True)
+                    'html': content_node.prettify(),
+                    'text': content_node.get_text(separator='\n', strip=True)
                 }
-            
             return {'html': '', 'text': ''}
         
         except Exception as e:
             self.log(f"提取内容时出错: {e}", "WARNING")
             return {'html': '', 'text': ''}
 
-    def download_file_with_retry(self, file_url, base_url=None, max_retries=2, timeout=10):
+    def download_file_with_retry(self, file_url, base_url=None, timeout=10):
         """
-        下载文件，支持重试机制
+        下载文件，失败时按重试策略重试
+        经过共享图片缓存，已缓存的文件不再访问网络
         """
         if not self.is_crawling:
             return None
@@ -271,30 +440,168 @@ class PBCCrawler:
         if base_url and not file_url.startswith(('http://', 'https://')):
             file_url = urljoin(base_url, file_url)
         
-        for attempt in range(max_retries + 1):
-            if not self.is_crawling:
-                return None
-                
+        image_store = self.image_store
+        if image_store:
+            file_content = image_store.get(file_url)
+            if file_content is not None:
+                self.progress.add(images=1)
+                return file_content
+        
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0',
+            'Referer': base_url or 'http://www.pbc.gov.cn/'
+        }
+        
+        try:
+            response = self.retry_policy.call(self.session.get, file_url, headers=headers, timeout=timeout)
+            if response.status_code == 200:
+                if image_store:
+                    image_store.put(file_url, response.content)
+                self.progress.add(images=1, bytes=len(response.content))
+                self.emit('image_done', 'DEBUG', "文件已下载: {url} ({size} 字节)", url=file_url, size=len(response.content))
+                return response.content
+            else:
+                self.log(f"文件下载失败，状态码：{response.status_code}，URL：{file_url}", "WARNING")
+        except requests.exceptions.RequestException as e:
+            self.log(f"文件下载失败，放弃下载：{e}，URL：{file_url}", "WARNING")
+        
+        return None
+
+    def download_attachment(self, file_url, base_url, dest_path, timeout=15):
+        """
+        流式下载附件到 dest_path，按块写盘，内存占用与文件大小无关
+        先写入以URL哈希命名的 .part 文件，完成后再改名；失败时按重试策略重试，重试（包括下次运行）
+        时用 HTTP Range 从已下载的位置续传。.part 旁边保存服务器返回的 ETag/Last-Modified，
+        续传时通过 If-Range 让服务器确认文件未变化；服务器返回200、Content-Range 或校验值
+        不一致时丢弃已下载部分，从头下载
+        超过 attachment_max_mb 的文件放弃下载，成功时返回文件字节数，失败返回None
+        """
+        if not self.is_crawling:
+            return None
+        
+        # 如果是相对路径，组合成完整URL
+        if base_url and not file_url.startswith(('http://', 'https://')):
+            file_url = urljoin(base_url, file_url)
+        
+        max_bytes = self.config['attachment_max_mb'] * 1024 * 1024
+        chunk_size = self.config['attachment_chunk_kb'] * 1024
+        # 未完成的文件按URL命名，不同URL的同名附件不会续传到同一个文件
+        url_key = hashlib.sha1(file_url.encode('utf-8')).hexdigest()[:16]
+        part_path = os.path.join(os.path.dirname(dest_path), f"{url_key}.part")
+        meta_path = part_path + '.json'
+        outcome = {}
+        
+        def discard_part():
+            for path in (part_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        def load_validator():
             try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0',
-                    'Referer': base_url or 'http://www.pbc.gov.cn/'
-                }
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+            return meta if meta.get('url') == file_url and (meta.get('etag') or meta.get('last_modified')) else None
+        
+        def response_validator(response):
+            return {'url': file_url, 'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')}
+        
+        def fetch(url, **kwargs):
+            """发送一次请求并把响应体写入 .part 文件，写盘途中断开时抛出异常，由重试策略续传"""
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0',
+                'Referer': base_url or 'http://www.pbc.gov.cn/'
+            }
+            resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            validator = load_validator() if resume_from else None
+            if resume_from and validator is None:
+                # 没有校验值无法确认已下载部分属于同一文件，从头下载
+                discard_part()
+                resume_from = 0
+            if resume_from:
+                headers['Range'] = f'bytes={resume_from}-'
+                # 弱 ETag 不能用于 If-Range，此时改用 Last-Modified
+                etag = validator.get('etag')
+                if_range = etag if etag and not etag.startswith('W/') else validator.get('last_modified')
+                if if_range:
+                    headers['If-Range'] = if_range
+            
+            with self.session.get(url, headers=headers, stream=True, **kwargs) as response:
+                if response.status_code == 416 and resume_from:
+                    # 已下载部分与服务器文件不一致，丢弃后从头下载
+                    discard_part()
+                    outcome['restart'] = True
+                    self.log(f"续传位置无效，重新下载: {url}", "WARNING")
+                    return response
+                if response.status_code not in (200, 206):
+                    return response
                 
-                response = requests.get(file_url, headers=headers, timeout=timeout)
-                if response.status_code == 200:
-                    return response.content
+                current = response_validator(response)
+                if response.status_code == 206:
+                    content_range = response.headers.get('Content-Range', '')
+                    changed = any(current[key] and current[key] != validator.get(key) for key in ('etag', 'last_modified'))
+                    if not resume_from or not content_range.startswith(f'bytes {resume_from}-') or changed:
+                        discard_part()
+                        outcome['restart'] = True
+                        self.log(f"服务器文件已变化或续传范围不符，重新下载: {url}", "WARNING")
+                        return response
+                    mode = 'ab'
+                    self.log(f"从 {resume_from} 字节处续传: {os.path.basename(dest_path)}")
                 else:
-                    self.log(f"文件下载失败，状态码：{response.status_code}，URL：{file_url}", "WARNING")
-            except requests.exceptions.Timeout:
-                self.log(f"文件下载超时（尝试 {attempt+1}/{max_retries+1}），URL：{file_url}", "WARNING")
-            except requests.exceptions.RequestException as e:
-                self.log(f"文件下载错误（尝试 {attempt+1}/{max_retries+1}）：{e}，URL：{file_url}", "WARNING")
-            
-            # 如果不是最后一次尝试，等待一段时间后重试
-            if attempt < max_retries:
-                time.sleep(1)
+                    # 服务器返回完整文件（不支持续传或文件已变化），覆盖已下载部分
+                    mode = 'wb'
+                    resume_from = 0
+                    if current['etag'] or current['last_modified']:
+                        with open(meta_path, 'w', encoding='utf-8') as f:
+                            json.dump(current, f)
+                    elif os.path.exists(meta_path):
+                        os.remove(meta_path)
+                
+                content_length = response.headers.get('Content-Length')
+                if content_length and content_length.isdigit() and resume_from + int(content_length) > max_bytes:
+                    outcome['too_large'] = True
+                    return response
+                
+                written = resume_from
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if not self.is_crawling:
+                            outcome['stopped'] = True
+                            return response
+                        written += len(chunk)
+                        self.progress.add(bytes=len(chunk))
+                        if written > max_bytes:
+                            outcome['too_large'] = True
+                            break
+                        f.write(chunk)
+                
+                if outcome.get('too_large'):
+                    discard_part()
+                    return response
+                
+                os.replace(part_path, dest_path)
+                if os.path.exists(meta_path):
+                    os.remove(meta_path)
+                outcome['size'] = written
+                return response
         
+        try:
+            response = self.retry_policy.call(fetch, file_url, timeout=timeout)
+            if outcome.pop('restart', False):
+                # 丢弃无效的 .part 后从头下载一次
+                response = self.retry_policy.call(fetch, file_url, timeout=timeout)
+        except (requests.exceptions.RequestException, OSError) as e:
+            self.log(f"文件下载失败，放弃下载：{e}，URL：{file_url}", "WARNING")
+            return None
+        
+        if 'size' in outcome:
+            return outcome['size']
+        if outcome.get('too_large'):
+            self.log(f"附件超过大小上限 {self.config['attachment_max_mb']}MB，跳过: {file_url}", "WARNING")
+        elif not outcome.get('stopped'):
+            self.log(f"文件下载失败，状态码：{response.status_code}，URL：{file_url}", "WARNING")
         return None
 
     def get_article_base_url(self, article_url):
@@ -336,109 +643,118 @@ class PBCCrawler:
         
         return clean_name
 
-    def save_html_to_doc(self, html_content, doc_filename, article_url):
+    def prepare_html_doc(self, html_content, article_url):
+        """
+        准备文档渲染所需的数据：从HTML内容（或已解析的正文节点）提取文本并依次下载图片
+        返回 (正文文本, [(图片地址, 图片数据或None)])
+        """
+        soup = self.parse_document(html_content)
+        
+        # 从文章URL获取基础URL（目录部分）
+        article_base_url = self.get_article_base_url(article_url)
+        
+        # 检查是否有图片
+        img_elements = soup.find_all('img')
+        total_images = len(img_elements)
+        images = []
+        
+        if total_images > 0:
+            self.emit('images_found', 'INFO', "发现 {count} 张图片，将下载并保存到文档", count=total_images)
+            for i, img_element in enumerate(img_elements, 1):
+                if not self.is_crawling:
+                    break
+                    
+                img_src = img_element.get('src')
+                if img_src:
+                    self.emit('image_started', 'DEBUG', "正在下载第 {index}/{total} 张图片: {url}",
+                              index=i, total=total_images, url=img_src)
+                    # 使用文章基础URL作为图片下载的基础URL
+                    images.append((img_src, self.download_file_with_retry(img_src, article_base_url, timeout=10)))
+        else:
+            self.log("没有发现图片，直接保存文本内容")
+        
+        return soup.get_text(separator='\n', strip=True), images
+
+    def log_messages(self, messages):
+        """输出渲染进程返回的日志"""
+        for level, message in messages:
+            self.log(message, level)
+
+    def missing_images(self, images):
+        """统计下载失败的图片数，有失败时提示下次运行重新处理"""
+        missing = sum(1 for _, image_content in images if not image_content)
+        if missing:
+            self.log(f"{missing} 张图片下载失败，文章将在下次运行时重新处理", "WARNING")
+        return missing
+
+    def save_html_to_doc(self, html_content, doc_filename, article_url, keywords=None):
         """
-        将HTML内容保存到Word文档，有图片就下载保存，没有就直接保存文本
+        将HTML内容（或已解析的正文节点）保存到Word文档，有图片就下载保存，没有就直接保存文本
+        在当前线程中生成文档，keywords 为文档标记的搜索关键词
+        图片下载失败时仍生成文档（失败的图片用占位文字代替），但返回False；
+        下载图片期间停止爬取时不生成文档，返回None
         """
         if not self.is_crawling:
-            return False
+            return None
             
         try:
-            doc = Document()
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 从文章URL获取基础URL（目录部分）
-            article_base_url = self.get_article_base_url(article_url)
-            
-            # 检查是否有图片
-            img_elements = soup.find_all('img')
-            total_images = len(img_elements)
-            
-            if total_images > 0:
-                # 有图片的情况：分别处理文本和图片
-                self.log(f"发现 {total_images} 张图片，将下载并保存到文档")
-                
-                # 统计图片下载情况
-                successful_images = 0
-                
-                # 先处理所有文本内容
-                all_text = soup.get_text(separator='\n', strip=True)
-                if all_text:
-                    lines = all_text.split('\n')
-                    for line in lines:
-                        if line.strip():
-                            doc.add_paragraph(line.strip())
-                
-                # 然后处理图片
-                for i, img_element in enumerate(img_elements, 1):
-                    if not self.is_crawling:
-                        break
-                        
-                    img_src = img_element.get('src')
-                    if img_src:
-                        self.log(f"正在下载第 {i}/{total_images} 张图片: {img_src}")
-                        # 使用文章基础URL作为图片下载的基础URL
-                        image_content = self.download_file_with_retry(img_src, article_base_url, max_retries=2, timeout=10)
-                        
-                        if image_content:
-                            try:
-                                # 保存图片到临时文件
-                                temp_img_path = f'temp_image_{i}.jpg'
-                                with open(temp_img_path, 'wb') as f:
-                                    f.write(image_content)
-                                
-                                # 添加到Word文档
-                                doc.add_picture(temp_img_path, width=Inches(6))
-                                successful_images += 1
-                                
-                                # 删除临时文件
-                                os.remove(temp_img_path)
-                                
-                            except Exception as e:
-                                self.log(f"处理图片文件失败 {img_src}: {e}", "WARNING")
-                                doc.add_paragraph(f"[图片加载失败: {img_src}]")
-                        else:
-                            doc.add_paragraph(f"[图片下载失败: {img_src}]")
-                
-                # 保存文档
-                doc.save(doc_filename)
-                self.log(f"文档已保存为: {doc_filename}，图片下载成功率: {successful_images}/{total_images}")
-                return True
-                
-            else:
-                # 没有图片的情况：直接保存文本内容
-                self.log("没有发现图片，直接保存文本内容")
-                all_text = soup.get_text(separator='\n', strip=True)
-                
-                if all_text:
-                    lines = all_text.split('\n')
-                    for line in lines:
-                        if line.strip():
-                            doc.add_paragraph(line.strip())
-                    
-                    doc.save(doc_filename)
-                    self.log(f"文档已保存为: {doc_filename}，共 {len(lines)} 行文本")
-                    return True
-                else:
-                    self.log("警告：没有提取到任何文本内容", "WARNING")
-                    # 保存一个空的文档或包含提示信息的文档
-                    doc.add_paragraph("该页面没有提取到任何文本内容")
-                    doc.save(doc_filename)
-                    return True
+            text, images = self.prepare_html_doc(html_content, article_url)
+            if not self.is_crawling:
+                return None
+            self.log_messages(render_text_doc(doc_filename, text, images, keywords))
+            return not self.missing_images(images)
+        
+        except Exception as e:
+            self.log(f"保存文档时出错: {e}", "ERROR")
+            return False
+
+    def queue_html_doc(self, html_content, doc_filename, article_url, on_saved, keywords=None):
+        """
+        把文档交给渲染阶段生成，不等待生成完成：文本提取和图片下载在当前线程进行，
+        文档在渲染进程中生成，完成后调用 on_saved(是否成功)，有图片下载失败时也算不成功
+        渲染阶段未启动时在当前线程生成
+        下载图片期间停止爬取时不生成文档，也不调用 on_saved，返回False
+        """
+        if self.renderer is None:
+            doc_success = self.save_html_to_doc(html_content, doc_filename, article_url, keywords)
+            if doc_success is None:
+                return False
+            on_saved(doc_success)
+            return True
         
+        try:
+            text, images = self.prepare_html_doc(html_content, article_url)
         except Exception as e:
             self.log(f"保存文档时出错: {e}", "ERROR")
+            on_saved(False)
+            return True
+        
+        if not self.is_crawling:
             return False
+        complete = not self.missing_images(images)
+        
+        def finished(future):
+            try:
+                self.log_messages(future.result())
+            except Exception as e:
+                self.log(f"保存文档时出错: {e}", "ERROR")
+                on_saved(False)
+            else:
+                on_saved(complete)
+        
+        self.renderer.submit(render_text_doc, doc_filename, text, images, keywords, callback=finished)
+        return True
 
     def download_excel_files(self, html_content, article_url, output_folder, title):
         """
-        从HTML内容中提取并下载Excel文件
+        从HTML内容（或已解析的DOM）中提取并下载Excel文件
+        返回 (成功下载数, 失败数)
         """
         if not self.is_crawling:
-            return 0
+            return 0, 0
             
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = self.parse_document(html_content)
             article_base_url = self.get_article_base_url(article_url)
             
             # 查找所有链接，筛选出Excel文件
@@ -461,7 +777,7 @@ class PBCCrawler:
             
             if not excel_links:
                 self.log("未发现Excel文件")
-                return 0
+                return 0, 0
             
             self.log(f"发现 {len(excel_links)} 个Excel文件链接")
             
@@ -470,73 +786,107 @@ class PBCCrawler:
             if not os.path.exists(excel_folder):
                 os.makedirs(excel_folder)
             
-            # 下载每个Excel文件
-            downloaded_count = 0
+            # 先依次确定每个文件的保存路径，避免并发下载时文件名冲突
+            store = self.attachment_store
+            downloads = []
+            reserved_names = set()
+            seen_urls = set()
+            reused_count = 0
             for i, excel_link in enumerate(excel_links, 1):
-                if not self.is_crawling:
-                    break
-                    
                 excel_url = excel_link['url']
                 excel_text = excel_link['text']
                 
-                self.log(f"正在下载第 {i}/{len(excel_links)} 个Excel文件: {excel_text}")
+                # 同一篇文章中重复出现的附件链接只处理一次
+                full_url = excel_url if excel_url.startswith(('http://', 'https://')) else urljoin(article_base_url, excel_url)
+                if full_url in seen_urls:
+                    self.log(f"重复的附件链接，跳过: {excel_text}")
+                    continue
+                seen_urls.add(full_url)
+                
+                # 确定文件扩展名
+                file_ext = '.xls'
+                for ext in excel_extensions:
+                    if ext in excel_url.lower():
+                        file_ext = ext
+                        break
                 
-                # 下载文件
-                file_content = self.download_file_with_retry(excel_url, article_base_url, max_retries=2, timeout=15)
+                # 清理文件名
+                safe_excel_text = self.clean_filename(excel_text, max_length=50)
+                if safe_excel_text == '未命名文件':
+                    safe_excel_text = f"{self.clean_filename(title, max_length=30)}_附件{i}"
                 
-                if file_content:
-                    # 确定文件扩展名
-                    file_ext = '.xls'
-                    for ext in excel_extensions:
-                        if ext in excel_url.lower():
-                            file_ext = ext
-                            break
-                    
-                    # 清理文件名
-                    safe_excel_text = self.clean_filename(excel_text, max_length=50)
-                    if safe_excel_text == '未命名文件':
-                        safe_excel_text = f"{self.clean_filename(title, max_length=30)}_附件{i}"
-                    
-                    # 确保文件名以扩展名结尾
-                    if not safe_excel_text.endswith(file_ext):
-                        safe_excel_text += file_ext
-                    
-                    # 保存文件
-                    excel_filename = os.path.join(excel_folder, safe_excel_text)
-                    
-                    # 处理文件名冲突
-                    counter = 1
-                    original_name = excel_filename
-                    while os.path.exists(excel_filename):
-                        name_part, ext_part = os.path.splitext(original_name)
-                        excel_filename = f"{name_part}_{counter}{ext_part}"
-                        counter += 1
-                    
-                    try:
-                        with open(excel_filename, 'wb') as f:
-                            f.write(file_content)
-                        
-                        self.log(f"Excel文件已保存: {excel_filename}")
-                        downloaded_count += 1
-                        
-                        # 添加延迟，避免请求过快
-                        if i < len(excel_links):
-                            time.sleep(1)
-                    except Exception as e:
-                        self.log(f"保存Excel文件失败: {e}", "WARNING")
-                else:
+                # 确保文件名以扩展名结尾
+                if not safe_excel_text.endswith(file_ext):
+                    safe_excel_text += file_ext
+                
+                # 保存文件
+                excel_filename = os.path.join(excel_folder, safe_excel_text)
+                
+                # 之前下载过的附件：同名文件内容相同时直接沿用，不再下载和写盘
+                stored = store.get_path(full_url) if store else None
+                if stored and os.path.exists(excel_filename) and store.same_content(excel_filename, stored[0]):
+                    self.log(f"附件已存在，沿用: {safe_excel_text}")
+                    self.progress.add(attachments=1)
+                    reused_count += 1
+                    continue
+                
+                # 处理文件名冲突（未完成的下载按URL命名，不占用显示名）
+                counter = 1
+                original_name = excel_filename
+                while os.path.exists(excel_filename) or excel_filename in reserved_names:
+                    name_part, ext_part = os.path.splitext(original_name)
+                    excel_filename = f"{name_part}_{counter}{ext_part}"
+                    counter += 1
+                reserved_names.add(excel_filename)
+                
+                downloads.append((i, full_url, excel_text, excel_filename, stored))
+            
+            def download(item):
+                i, excel_url, excel_text, excel_filename, stored = item
+                if stored:
+                    # 之前下载过的附件，硬链接到结果目录，不再下载
+                    linked = store.link_or_copy(stored[1], excel_filename)
+                    self.log(f"附件已下载过，{'硬链接' if linked else '复制'}到: {excel_filename}")
+                    self.progress.add(attachments=1)
+                    return True
+                
+                self.emit('attachment_started', 'DEBUG', "正在下载第 {index}/{total} 个Excel文件: {name}",
+                          index=i, total=len(excel_links), name=excel_text)
+                size = self.download_attachment(excel_url, article_base_url, excel_filename, timeout=15)
+                if size is None:
                     self.log(f"下载Excel文件失败: {excel_url}", "WARNING")
+                    return False
+                
+                self.progress.add(attachments=1)
+                self.emit('attachment_done', 'INFO', "Excel文件已保存: {path} ({kb:.1f} KB)",
+                          path=excel_filename, size=size, kb=size / 1024)
+                if store:
+                    # 登记到附件存储，内容与已有附件相同时替换为硬链接
+                    store.put_file(excel_url, excel_filename)
+                return True
             
-            self.log(f"成功下载 {downloaded_count}/{len(excel_links)} 个Excel文件")
-            return downloaded_count
+            # 并发下载，每个文件边下载边写盘
+            downloaded_count = reused_count
+            if downloads:
+                workers = max(1, min(self.config['attachment_workers'], len(downloads)))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    downloaded_count += sum(executor.map(download, downloads))
+            
+            self.log(f"成功下载 {downloaded_count}/{len(seen_urls)} 个Excel文件")
+            return downloaded_count, len(seen_urls) - downloaded_count
             
         except Exception as e:
             self.log(f"下载Excel文件时出错: {e}", "WARNING")
-            return 0
+            return 0, 1
 
-    def process_single_url(self, url, output_folder="documents"):
+    def process_single_url(self, url, output_folder="documents", on_complete=None, keywords=None):
         """
         处理单个URL：获取内容并保存为Word文档和Excel文件
+        on_complete 指定时文档交给渲染阶段生成，本方法返回True后，文档生成完成时
+        调用 on_complete(是否成功)；未指定时在当前线程生成文档并返回是否成功
+        图片或附件下载失败时文档照常生成，但不算成功，以便下次运行重新处理；
+        下载期间停止爬取时不生成文档，返回False且不调用 on_complete
+        keywords 为匹配到该文章的搜索关键词，写入文档的关键词属性
         """
         if not self.is_crawling:
             return False
@@ -548,14 +898,30 @@ class PBCCrawler:
                 'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
             }
             
-            self.log(f"正在处理: {url}")
-            response = requests.get(url, headers=headers, timeout=self.config['timeout'])
+            self.emit('article_fetch', 'DEBUG', "正在处理: {url}", url=url)
+            get = functools.partial(self.retry_policy.call, self.session.get)
+            if self.http_cache:
+                response = self.http_cache.fetch(get, url, headers=headers, timeout=self.config['timeout'])
+                
+                # 页面未变化（缓存有效或服务器返回304）且完整生成的文档仍在，跳过下载和解析
+                doc_path = response.extra.get('doc_path') if response.not_modified else None
+                if doc_path and response.extra.get('complete', True) and os.path.exists(doc_path):
+                    self.emit('doc_reused', 'INFO', "页面未变化，沿用已有文档: {name}",
+                              name=os.path.basename(doc_path), path=doc_path)
+                    if on_complete:
+                        on_complete(True)
+                    return True
+            else:
+                response = get(url, headers=headers, timeout=self.config['timeout'])
+            # 与东方财富相同，只统计实际从服务器下载的页面字节数，未变化的缓存页面不计
+            if not getattr(response, 'not_modified', False):
+                self.progress.add(bytes=len(response.content))
             response.encoding = 'utf-8'
             content = response.text
             
-            # 提取标题和内容
-            title = self.extract_title(content)
-            page_content = self.extract_content(content)
+            # 只解析一次页面，标题、正文、图片和附件提取共用
+            soup = self.parse_document(content)
+            title = self.extract_title(soup)
             
             if not title:
                 title = "未知标题"
@@ -568,40 +934,59 @@ class PBCCrawler:
             if not os.path.exists(output_folder):
                 os.makedirs(output_folder)
             
-            # 保存为Word文档
-            doc_filename = os.path.join(output_folder, f"{safe_title}.docx")
-            
-            # 如果没有找到内容，尝试使用整个body
-            if not page_content['html']:
-                self.log("未找到特定内容区域，尝试提取整个页面内容")
-                soup = BeautifulSoup(content, 'html.parser')
-                body_content = soup.find('body')
-                if body_content:
-                    page_content = {
-                        'html': body_content.prettify(),
-                        'text': body_content.get_text(separator='\n', strip=True)
-                    }
-            
             # 如果连body都没有，使用整个页面内容
-            if not page_content['html']:
+            content_node = self.extract_content_node(soup)
+            if content_node is None:
                 self.log("使用整个页面内容")
-                page_content = {
-                    'html': content,
-                    'text': content
-                }
-            
-            # 传递文章URL给save_html_to_doc函数，用于构建图片URL
-            doc_success = self.save_html_to_doc(page_content['html'], doc_filename, url)
+                content_node = soup
             
             # 下载Excel文件
-            excel_count = self.download_excel_files(content, url, output_folder, title)
+            excel_count, excel_failed = self.download_excel_files(soup, url, output_folder, title)
+            if not self.is_crawling:
+                return False
+            
+            # 保存为Word文档：之前为该URL生成过文档时原地更新，否则预占一个不重名的路径，
+            # 标题相同（或截断后相同）的文章同时渲染时不会写到同一个文件
+            previous_doc = getattr(response, 'extra', {}).get('doc_path')
+            reserved = not (previous_doc and os.path.exists(previous_doc))
+            doc_filename = reserve_doc_path(output_folder, safe_title) if reserved else previous_doc
+            
+            def finished(doc_success):
+                if not doc_success and reserved and os.path.exists(doc_filename) and not os.path.getsize(doc_filename):
+                    # 文档没有生成，删除预占的空文件
+                    release_doc_path(doc_filename)
+                elif self.http_cache:
+                    # 记录该URL的文档路径，只有完整处理的文章在页面未变化时直接沿用
+                    self.http_cache.annotate(url, doc_path=doc_filename, complete=bool(doc_success and not excel_failed))
+                
+                if doc_success and not excel_failed:
+                    self.emit('article_done', 'INFO', "成功处理: {title} (下载了 {attachments} 个Excel文件)",
+                              title=title, attachments=excel_count)
+                    doc_success = True
+                else:
+                    if excel_failed:
+                        self.log(f"{excel_failed} 个Excel文件下载失败，文章将在下次运行时重新处理", "WARNING")
+                    self.log(f"处理失败: {title}", "WARNING")
+                    doc_success = False
+                if on_complete:
+                    on_complete(doc_success)
             
-            if doc_success:
-                self.log(f"成功处理: {title} (下载了 {excel_count} 个Excel文件)")
+            if on_complete is None:
+                # 传递文章URL给save_html_to_doc函数，用于构建图片URL
+                doc_success = self.save_html_to_doc(content_node, doc_filename, url, keywords)
+                if doc_success is None:
+                    if reserved:
+                        release_doc_path(doc_filename)
+                    return False
+                finished(doc_success)
+                return doc_success and not excel_failed
+            
+            # 文档交给渲染阶段生成，抓取线程继续处理下一个链接
+            if self.queue_html_doc(content_node, doc_filename, url, finished, keywords):
                 return True
-            else:
-                self.log(f"处理失败: {title}", "WARNING")
-                return False
+            if reserved:
+                release_doc_path(doc_filename)
+            return False
             
         except Exception as e:
             self.log(f"处理URL {url} 时出错: {e}", "ERROR")
@@ -624,15 +1009,29 @@ class PBCCrawler:
         
         return unique_links
 
-    def crawl_and_process_pages(self, keyword="金融监管", start_page=1, end_page=None, output_folder="documents"):
+    def open_frontier(self, output_folder):
+        """打开结果目录下的持久化链接待办队列"""
+        if not os.path.exists(output_folder):
+            os.makedirs(output_folder)
+        return UrlFrontier(os.path.join(output_folder, self.config['frontier_name']), self.config['frontier_capacity'])
+
+    def collect_links(self, frontier, keyword, start_page=1, end_page=None):
         """
-        主函数：爬取多页搜索结果并处理每个链接
+        爬取搜索结果页，把每页提取到的链接加入待办队列，已在队列中的链接保持原状态
+        newest_first 模式下按日期从新到旧翻页：早于 date_cutoff 的结果不加入队列，
+        整页都早于截止日期时停止；之前已有完整的列表记录时，整页没有新链接即停止
+        每个链接都标记上关键词，多个关键词共用一个队列时，同一链接只处理一次
+        无法获取第一页时返回False
         """
-        if not self.is_crawling:
-            return False
-            
-        all_links_data = []
         page_links_count = {}  # 记录每页提取的链接数量
+        failed_pages = []  # 获取失败的页码
+        original_count = 0
+        new_count = 0
+        newest_first = self.config['newest_first']
+        date_cutoff = self.config['date_cutoff']
+        listing_key = f"listing_complete:{keyword}"
+        # 只有之前完整翻过一遍列表，遇到已记录的链接才能说明更早的结果都已记录
+        stop_on_known = newest_first and frontier.get_meta(listing_key) == '1'
         
         # 第一步：获取总页数
         self.log(f"开始爬取搜索结果页面，关键词: {keyword}")
@@ -652,19 +1051,25 @@ class PBCCrawler:
             total_pages = end_page
         
         self.log(f"计划爬取页码范围: {start_page} - {end_page}")
+        self.progress.add(pages_total=max(end_page - start_page + 1, 0))
+        # 从第一页翻到最后一页且每页都获取成功，才算完整的列表记录；
+        # 因截止日期、没有新链接或用户停止而提前结束时，更早的页面没有翻过，不能记为完整
+        listing_complete = start_page <= 1 and end_page >= total_pages
+        
+        # 第二步：爬取所有页面，第一页已经获取过内容，其余页面并发获取，按页码顺序处理
+        if start_page <= 1:
+            fetched_pages = self.fetch_pages_concurrently(keyword, range(2, end_page + 1))
+            pages = itertools.chain([(1, first_page_content)], fetched_pages)
+        else:
+            fetched_pages = pages = self.fetch_pages_concurrently(keyword, range(start_page, end_page + 1))
         
-        # 第二步：爬取所有页面
-        for page in range(start_page, end_page + 1):
+        for page, content in pages:
             if not self.is_crawling:
+                listing_complete = False
                 break
+            self.progress.add(pages_listed=1)
                 
-            self.log(f"正在爬取第 {page} 页...")
-            
-            # 如果是第一页，已经获取过内容，直接使用
-            if page == 1:
-                content = first_page_content
-            else:
-                content = self.crawl_pbc_search(page=page, keyword=keyword)
+            self.emit('page_started', 'INFO', "正在爬取第 {page} 页...", page=page)
             
             if content:
                 page_links_data = self.extract_links_with_titles_from_result_list(content)
@@ -672,25 +1077,49 @@ class PBCCrawler:
                 # 先去除当前页的重复链接
                 unique_page_links = self.remove_duplicate_links(page_links_data)
                 
-                # 将当前页的后链接添加到总链接列表
-                all_links_data.extend(unique_page_links)
+                # 按日期翻页时，早于截止日期的结果不再加入队列
+                if newest_first and date_cutoff:
+                    recent_links = [link_data for link_data in unique_page_links
+                                    if not link_data['date'] or link_data['date'] >= date_cutoff]
+                    reached_cutoff = len(recent_links) < len(unique_page_links) and \
+                        not any(link_data['date'] for link_data in recent_links)
+                    unique_page_links = recent_links
+                else:
+                    reached_cutoff = False
+                
+                # 当前页的链接直接写入待办队列，不在内存中累积
+                page_new_count = 0
+                page_untagged_count = 0  # 之前没有被当前关键词匹配过的链接数
+                for link_data in unique_page_links:
+                    page_new_count += frontier.add(link_data['link'], link_data['title'])
+                    page_untagged_count += frontier.tag(link_data['link'], keyword)
+                original_count += len(unique_page_links)
+                new_count += page_new_count
                 page_links_count[page] = len(unique_page_links)  # 记录每页后的链接数量
                 
                 # 立即显示后提取的链接数量
-                self.log(f"第{page}页后提取到 {len(unique_page_links)} 个链接")
-            
-            # 添加随机延迟
-            if page < end_page and self.is_crawling:
-                delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-                self.log(f"等待{delay:.1f}秒后获取下一页...")
-                time.sleep(delay)
+                self.emit('page_listed', 'INFO', "第{page}页后提取到 {count} 个链接，其中新链接 {new} 个",
+                          page=page, count=len(unique_page_links), new=page_new_count)
+                
+                if reached_cutoff:
+                    self.log(f"第{page}页的结果已早于截止日期 {date_cutoff}，停止翻页")
+                    listing_complete = False
+                    break
+                # 其他关键词已加入队列的链接不算已记录，只看当前关键词
+                if stop_on_known and page_links_data and page_untagged_count == 0:
+                    self.log(f"第{page}页没有新链接，更早的结果均已记录，停止翻页")
+                    listing_complete = False
+                    break
+            else:
+                listing_complete = False
+                failed_pages.append(page)
+        
+        # 提前停止时取消尚未完成的翻页请求
+        fetched_pages.close()
         
-        # 去除所有页面之间的重复链接
         if self.is_crawling:
-            self.log("去除所有页面间的重复链接...")
-            original_count = len(all_links_data)
-            all_links_data = self.remove_duplicate_links(all_links_data)
-            duplicate_count = original_count - len(all_links_data)
+            if listing_complete:
+                frontier.set_meta(listing_key, '1')
             
             # 显示每页提取的链接数量汇总
             self.log("各页提取链接数量汇总:")
@@ -698,46 +1127,161 @@ class PBCCrawler:
                 self.log(f"第{page}页: {count}个链接")
             
             self.log(f"原始链接总数: {original_count}")
-            self.log(f"重复链接数: {duplicate_count}")
-            self.log(f"最终后链接数: {len(all_links_data)}")
+            self.log(f"重复或已记录的链接数: {original_count - new_count}")
+            self.log(f"新链接数: {new_count}")
+            if failed_pages:
+                self.log(f"搜索结果不完整：{len(failed_pages)} 页获取失败（第{', '.join(map(str, failed_pages[:20]))}"
+                         f"{' 等' if len(failed_pages) > 20 else ''}页），这些页面的链接没有加入队列，请稍后重新爬取", "ERROR")
         
-        # 如果后没有链接，直接返回
-        if len(all_links_data) == 0:
+        return True
+
+    def process_frontier(self, frontier, output_folder):
+        """按发现顺序处理待办队列中未完成的链接，跳过已完成的链接"""
+        max_attempts = self.config['frontier_max_attempts']
+        total = frontier.count_pending(max_attempts)
+        done_count = frontier.counts().get(UrlFrontier.DONE, 0)
+        exhausted_count = frontier.count_exhausted(max_attempts)
+        if exhausted_count:
+            self.log(f"{exhausted_count} 个链接已失败 {max_attempts} 次，不再重试", "WARNING")
+        
+        if total == 0:
+            if done_count:
+                self.log(f"全部 {done_count} 个链接均已处理，无需重复处理", "SUCCESS")
+                return True
+            # 如果没有链接，直接返回
             self.log("没有有效的链接可处理，程序结束", "WARNING")
             return False
         
         # 第三步：处理每个链接
-        self.log(f"开始处理 {len(all_links_data)} 个链接...")
-        success_count = 0
+        if done_count:
+            self.log(f"跳过已处理完成的 {done_count} 个链接")
+        self.log(f"开始处理 {total} 个链接...")
+        self.progress.set(articles_total=total)
+        outcomes = []  # 每个链接文档生成完成时追加结果
+        
+        def completed(url):
+            def done(success):
+                frontier.mark(url, UrlFrontier.DONE if success else UrlFrontier.FAILED)
+                outcomes.append(success)
+                self.progress.add(**{'articles_done' if success else 'articles_failed': 1})
+            return done
         
-        for i, link_data in enumerate(all_links_data, 1):
+        for i, link_data in enumerate(frontier.iter_pending(max_attempts), 1):
             if not self.is_crawling:
                 break
-                
-            self.log(f"[{i}/{len(all_links_data)}] 处理: {link_data['title']}")
             
-            if self.process_single_url(link_data['link'], output_folder):
-                success_count += 1
+            url = link_data['url']
+            keywords = frontier.get_tags(url)
+            self.emit('article_started', 'INFO', "[{index}/{total}] 处理: {title}", index=i, total=total, title=link_data['title'])
+            if len(keywords) > 1 and self.events.enabled('INFO'):
+                self.emit('article_keywords', 'INFO', "匹配关键词: {text}", text='、'.join(keywords), keywords=keywords)
+            
+            frontier.mark(url, UrlFrontier.IN_PROGRESS)
+            if not self.process_single_url(url, output_folder, on_complete=completed(url), keywords=keywords) and self.is_crawling:
+                frontier.mark(url, UrlFrontier.FAILED)
+                self.progress.add(articles_failed=1)
+            # 中途停止的链接不生成文档，保持处理中状态，下次运行时继续处理
             
             # 处理间隔
-            if i < len(all_links_data) and self.is_crawling:
+            if i < total and self.is_crawling:
                 delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-                self.log(f"等待{delay:.1f}秒后处理下一个链接...")
-                time.sleep(delay)
+                self.emit('wait', 'DEBUG', "等待{delay:.1f}秒后处理下一个链接...", delay=delay)
+                self.cancel_token.wait(delay)
+        
+        # 等待已提交的文档生成完毕
+        if self.renderer:
+            self.renderer.drain()
+        success_count = sum(outcomes)
         
         if self.is_crawling:
-            self.log(f"处理完成: 成功 {success_count}/{len(all_links_data)} 个链接", "SUCCESS")
+            self.log(f"处理完成: 成功 {success_count}/{total} 个链接", "SUCCESS")
             self.log(f"文档保存在: {output_folder} 文件夹中")
             self.log(f"Excel文件保存在: {os.path.join(output_folder, 'excel_files')} 文件夹中")
             return success_count > 0
         else:
-            self.log(f"爬取已停止: 已完成 {success_count} 个链接", "WARNING")
+            self.log(f"爬取已停止: 已完成 {success_count} 个链接，下次运行将从未完成的链接继续", "WARNING")
+            return False
+
+    def crawl_and_process_pages(self, keyword="金融监管", start_page=1, end_page=None, output_folder="documents"):
+        """
+        主函数：爬取多页搜索结果，把链接加入持久化待办队列，再处理队列中未完成的链接
+        中断后再次运行时跳过已完成的链接
+        """
+        return self.crawl_and_process_keywords([keyword], start_page, end_page, output_folder)
+
+    def crawl_and_process_keywords(self, keywords, start_page=1, end_page=None, output_folder="documents"):
+        """
+        批量爬取多个关键词：依次搜索每个关键词，结果链接合并到同一个去重的待办队列，
+        全部搜索完成后再处理队列，匹配多个关键词的文章只抓取和生成一次，
+        文档标记上匹配到的全部关键词
+        """
+        if not self.is_crawling:
+            return False
+        
+        frontier = self.open_frontier(output_folder)
+        self.renderer = DocRenderer(self.config['render_workers'], self.config['render_queue_size'], log_callback=self.log)
+        try:
+            collected = 0
+            for index, keyword in enumerate(keywords, 1):
+                if not self.is_crawling:
+                    break
+                if len(keywords) > 1:
+                    self.log(f"[关键词 {index}/{len(keywords)}] {keyword}")
+                if self.collect_links(frontier, keyword, start_page, end_page):
+                    collected += 1
+            
+            if not collected:
+                return False
+            success = self.process_frontier(frontier, output_folder)
+            if len(keywords) > 1:
+                # 等文档生成完毕（完成回调会更新链接状态）再写关键词索引
+                self.renderer.drain()
+                self.write_keyword_index(frontier, output_folder)
+            return success
+        finally:
+            # 先等文档生成完毕（完成回调会更新待办队列），再关闭队列
+            self.renderer.close()
+            self.renderer = None
+            frontier.close()
+
+    def write_keyword_index(self, frontier, output_folder):
+        """把每篇文章匹配到的关键词写入结果目录下的CSV索引"""
+        index_path = os.path.join(output_folder, self.config['keyword_index_name'])
+        try:
+            with open(index_path, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['标题', '链接', '状态', '关键词'])
+                for url, title, status, tags in frontier.iter_tagged():
+                    writer.writerow([title, url, status, '; '.join(tags)])
+            self.log(f"关键词索引已保存: {index_path}")
+        except OSError as e:
+            self.log(f"保存关键词索引失败: {e}", "WARNING")
+
+    def crawl_keywords(self, keywords, save_dir):
+        """批量爬取多个关键词的文章，匹配多个关键词的文章只处理一次"""
+        try:
+            self.is_crawling = True
+            self.progress.reset()
+            self.log(f"开始批量爬取中国人民银行，共 {len(keywords)} 个关键词: {'、'.join(keywords)}")
+            
+            success = self.crawl_and_process_keywords(keywords, output_folder=save_dir)
+            
+            if success:
+                self.log("中国人民银行批量爬取任务完成", "SUCCESS")
+            else:
+                self.log("中国人民银行批量爬取任务未完成", "WARNING")
+                
+            return success
+            
+        except Exception as e:
+            self.log(f"爬取过程中发生错误: {str(e)}", "ERROR")
             return False
 
     def crawl_keyword(self, keyword, save_dir):
         """爬取指定关键词的文章"""
         try:
             self.is_crawling = True
+            self.progress.reset()
             self.log(f"开始爬取中国人民银行，关键词: {keyword}")
             
             success = self.crawl_and_process_pages(keyword=keyword, output_folder=save_dir)
@@ -756,17 +1300,36 @@ class PBCCrawler:
 # 保留原有的main函数用于独立运行
 def main():
     import sys
-    if len(sys.argv) > 1:
-        keyword = sys.argv[1]
-    else:
-        keyword = input("请输入搜索关键词: ").strip()
+    keywords = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    # --keywords-file=路径 从文件读取关键词列表，每行一个
+    for arg in sys.argv[1:]:
+        if arg.startswith('--keywords-file='):
+            with open(arg.split('=', 1)[1], 'r', encoding='utf-8') as f:
+                keywords.extend(line.strip() for line in f if line.strip())
+    if not keywords:
+        keywords = [input("请输入搜索关键词: ").strip()]
+    keywords = [keyword for keyword in dict.fromkeys(keywords) if keyword]
     
-    if not keyword:
+    if not keywords:
         print("关键词不能为空")
         return
     
     crawler = PBCCrawler()
-    success = crawler.crawl_keyword(keyword, f"pbc_articles_{crawler.clean_filename(keyword)}")
+    # --newest 按日期从新到旧增量翻页，--since=YYYY-MM-DD 指定截止日期
+    for arg in sys.argv[1:]:
+        if arg == '--newest':
+            crawler.config['newest_first'] = True
+        elif arg.startswith('--since='):
+            crawler.config['newest_first'] = True
+            crawler.config['date_cutoff'] = arg.split('=', 1)[1]
+    try:
+        if len(keywords) > 1:
+            # 多个关键词合并到同一个结果目录和待办队列
+            success = crawler.crawl_keywords(keywords, "pbc_articles_batch")
+        else:
+            success = crawler.crawl_keyword(keywords[0], f"pbc_articles_{crawler.clean_filename(keywords[0])}")
+    finally:
+        crawler.close()
     
     if success:
         print("爬取任务完成")